@@ -1,18 +1,21 @@
 # backend/app/api/admin.py
-import os
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..db import AsyncSessionLocal
-from .. import crud
-from jose import jwt
-from dotenv import load_dotenv
-from ..schemas import ClientOut
-from typing import List
+from .. import crud, maintenance, passwords
+from ..audit import audit_log
+from ..compression import compression_stats
+from ..concurrency import limiters
+from ..config import get_settings
+from ..logging_config import NonBlockingQueueHandler
+from ..notifications import dispatcher
+from ..tracing import trace_buffer
+from ..schemas import AdminStats, AuditEventOut, ClientOut
+from typing import List, Optional
 from ..dependencies import get_current_admin, get_db
-
-load_dotenv()
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change_me_in_prod")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+from ..utils import decode_token_strict
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -31,7 +34,7 @@ async def admin_required(request: Request, db: AsyncSession = Depends(get_db)):
     if scheme.lower() != "bearer":
         raise HTTPException(status_code=401, detail="Invalid auth header.")
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = decode_token_strict(token)
         role = payload.get("role", "client")
         user_id = int(payload.get("sub"))
     except Exception:
@@ -60,19 +63,133 @@ async def list_clients(
 
 @router.post("/clients/{client_id}/status")
 async def set_client_status(
+    request: Request,
     client_id: int,
     status: str,
     db: AsyncSession = Depends(get_db),
-    _admin=Depends(get_current_admin),
+    admin=Depends(get_current_admin),
 ):
-    if status not in ("pending", "active", "rejected"):
+    if status not in crud.CLIENT_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status.")
-    client = await db.get(
-        __import__("..models", fromlist=["models"]).models.Client, client_id
-    )
+    client = await crud.set_client_status(db, client_id, status)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found.")
-    client.status = status
-    await db.commit()
-    await db.refresh(client)
+    audit_log.record(
+        "admin.client_status",
+        request,
+        actor_id=admin.id,
+        target=client_id,
+        status=status,
+    )
     return {"detail": "updated", "client_id": client_id, "status": status}
+
+
+@router.get("/stats", response_model=AdminStats)
+async def dashboard_stats(
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(get_current_admin),
+):
+    """Dashboard aggregates read from pre-maintained rollups (no table scans)."""
+    counters, daily_rows = await crud.get_stats(db, days=days)
+    total = counters.get("clients.total", 0)
+    daily: dict = {}
+    for row in daily_rows:
+        daily.setdefault(row.day, {"day": row.day})[row.metric] = row.count
+    return {
+        "total_clients": total,
+        "clients_by_status": {
+            s: counters.get(f"clients.status.{s}", 0) for s in crud.CLIENT_STATUSES
+        },
+        "kyc_completion_rate": (
+            counters.get("clients.kyc_uploaded", 0) / total if total else 0.0
+        ),
+        "payment_completion_rate": (
+            counters.get("clients.payment_verified", 0) / total if total else 0.0
+        ),
+        "daily": list(daily.values()),
+    }
+
+
+@router.get("/diagnostics")
+async def diagnostics(_admin=Depends(get_current_admin)):
+    """Resolved runtime configuration (secrets masked) and runtime metrics."""
+    return {
+        "settings": get_settings().public_dict(),
+        "compression": compression_stats.snapshot(),
+        "logging": {"dropped_records": NonBlockingQueueHandler.dropped},
+        "tracing": trace_buffer.snapshot(),
+        "audit": audit_log.snapshot(),
+        "notifications": dispatcher.snapshot(),
+        "passwords": passwords.snapshot(),
+        "concurrency": {name: lim.snapshot() for name, lim in limiters.items()},
+    }
+
+
+@router.get("/traces")
+async def recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    min_duration_ms: float = Query(0, ge=0),
+    _admin=Depends(get_current_admin),
+):
+    """Most recent sampled traces (newest first), optionally only slow ones."""
+    traces = []
+    for trace in reversed(trace_buffer.traces):
+        root = trace["spans"][-1] if trace["spans"] else None
+        if root and (root["duration_ms"] or 0) >= min_duration_ms:
+            traces.append(trace)
+            if len(traces) >= limit:
+                break
+    return traces
+
+
+async def _maintenance_call(fn, *args):
+    """Run a blocking maintenance function off the event loop."""
+    try:
+        return await asyncio.to_thread(fn, *args)
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/db/report")
+async def db_report(_admin=Depends(get_current_admin)):
+    """Database size, page usage and per-table/index storage and statistics."""
+    return await _maintenance_call(maintenance.report)
+
+
+@router.post("/db/maintenance")
+async def db_maintenance(
+    full_check: bool = False,
+    vacuum_pages: int = Query(None, ge=1),
+    _admin=Depends(get_current_admin),
+):
+    """Integrity check, sampled statistics refresh and incremental vacuum."""
+    return await _maintenance_call(
+        maintenance.run_maintenance, vacuum_pages, full_check
+    )
+
+
+@router.post("/db/backup")
+async def db_backup(_admin=Depends(get_current_admin)):
+    """Online backup into BACKUP_DIR (paged, verified before it is kept)."""
+    return await _maintenance_call(maintenance.backup)
+
+
+@router.get("/audit", response_model=List[AuditEventOut])
+async def audit_events(
+    response: Response,
+    event: Optional[str] = None,
+    actor_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(get_current_admin),
+):
+    """Audit trail, newest first; pass X-Next-Cursor back as `before_id`.
+
+    Events reach the table within AUDIT_FLUSH_INTERVAL of happening.
+    """
+    rows = await crud.list_audit_events(db, event, actor_id, before_id, limit)
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
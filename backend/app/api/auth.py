@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app import schemas, crud, utils
+from app.audit import audit_log
+from app.config import get_settings
 from app.db import get_db
+from app.shared_state import get_shared_state
 
 
 router = APIRouter()
@@ -16,7 +20,7 @@ router = APIRouter()
 #     if existing:
 #         raise HTTPException(status_code=400, detail="Email already registered")
 
-#     new_user = await crud.create_user(db, user, user.password, role=role)
+#     new_user = await crud.create_user(db, user.email, user.password, role=role)
 #     return {
 #         "msg": f"{role.capitalize()} registered successfully",
 #         "user": new_user.email,
@@ -25,39 +29,67 @@ router = APIRouter()
 
 @router.post("/register/admin")
 async def register_admin(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
-    new_user = await crud.create_user(db, user, user.password, role="admin")
+    new_user = await crud.create_user(db, user.email, user.password, role="admin")
     return {"msg": "Admin registered successfully", "user": new_user.email}
 
 
 @router.post("/register/staff")
 async def register_staff(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
-    new_user = await crud.create_user(db, user, user.password, role="staff")
+    new_user = await crud.create_user(db, user.email, user.password, role="staff")
     return {"msg": "Staff registered successfully", "user": new_user.email}
 
 
 @router.post("/register/client")
 async def register_client(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
-    new_user = await crud.create_user(db, user, user.password, role="client")
+    new_user = await crud.create_user(db, user.email, user.password, role="client")
     return {"msg": "Client registered successfully", "user": new_user.email}
 
 
-@router.post("/login")
+async def login_rate_limit(request: Request):
+    """Fixed one-minute window per client IP, counted across all workers.
+
+    Off unless LOGIN_RATE_LIMIT_PER_MINUTE is set. The IP is the socket peer,
+    i.e. the proxy's unless forwarded headers are trusted.
+    """
+    limit = get_settings().login_rate_limit_per_minute
+    if not limit:
+        return
+    ip = request.client.host if request.client else "unknown"
+    window = int(time.time() // 60)
+    count = await get_shared_state().incr(f"ratelimit:login:{ip}:{window}", ttl=60)
+    if count > limit:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Try again shortly.",
+            headers={"Retry-After": str(60 - int(time.time()) % 60)},
+        )
+
+
+@router.post("/login", dependencies=[Depends(login_rate_limit)])
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db),
 ):
     user = await crud.authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        audit_log.record(
+            "auth.login", request, outcome="failure", target=form_data.username
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
 
     access_token = utils.create_access_token(user.id, user.email, user.role)
+    audit_log.record("auth.login", request, actor_id=user.id, target=user.email)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/refresh", response_model=schemas.Token)
 async def refresh(
-    refresh_token: Optional[str] = None, db: AsyncSession = Depends(get_db)
+    request: Request,
+    refresh_token: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Exchange a valid refresh_token for a new access token.
@@ -68,10 +100,18 @@ async def refresh(
         raise HTTPException(status_code=400, detail="Missing refresh_token.")
     rt = await crud.get_refresh_token(db, refresh_token)
     if not rt or rt.revoked:
+        audit_log.record("auth.refresh", request, outcome="failure", reason="invalid")
         raise HTTPException(status_code=401, detail="Invalid refresh token.")
     from datetime import datetime, timezone
 
     if rt.expires_at < datetime.now(timezone.utc):
+        audit_log.record(
+            "auth.refresh",
+            request,
+            outcome="failure",
+            actor_id=rt.user_id,
+            reason="expired",
+        )
         raise HTTPException(status_code=401, detail="Refresh token expired.")
     user = await crud.get_user_by_id(db, rt.user_id)
     if not user:
@@ -79,16 +119,21 @@ async def refresh(
     access_token = utils.create_access_token(
         subject=user.id, email=user.email, role=user.role
     )
+    audit_log.record("auth.refresh", request, actor_id=user.id)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/revoke_refresh")
 async def revoke_refresh(
-    refresh_token: Optional[str] = None, db: AsyncSession = Depends(get_db)
+    request: Request,
+    refresh_token: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
     if not refresh_token:
         raise HTTPException(status_code=400, detail="Missing refresh_token.")
     rt = await crud.revoke_refresh_token(db, refresh_token)
     if not rt:
+        audit_log.record("auth.revoke_refresh", request, outcome="failure")
         raise HTTPException(status_code=404, detail="Refresh token not found.")
+    audit_log.record("auth.revoke_refresh", request, actor_id=rt.user_id)
     return {"detail": "revoked"}
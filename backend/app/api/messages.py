@@ -1,13 +1,18 @@
 # backend/app/api/messages.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils import get_current_user
 from app.db import get_db
-from app import models, schemas, crud, utils
+from app.dependencies import get_current_admin
+from app import broadcasts, models, schemas, crud, utils
 
 router = APIRouter(tags=["Messages"])
 
+DEFAULT_PAGE_SIZE = 100
+
 
 @router.post("/", response_model=schemas.MessageOut)
 async def create_message(
@@ -22,11 +27,50 @@ async def create_message(
 
 @router.get("/", response_model=list[schemas.MessageOut])
 async def get_messages(
+    response: Response,
+    before_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=500),
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    """Retrieve all messages related to the current user."""
-    return await crud.get_user_messages(db, current_user.id)
+    """Messages related to the current user, newest first, one page at a time.
+
+    Pass the X-Next-Cursor header value as `before_id` for the next page.
+    """
+    page = await crud.get_user_messages_page(db, current_user.id, before_id, limit)
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = str(page[-1].id)
+    return page
+
+
+@router.post(
+    "/broadcast",
+    response_model=schemas.BroadcastJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def broadcast_message(
+    broadcast_in: schemas.BroadcastCreate,
+    db: AsyncSession = Depends(get_db),
+    current_admin=Depends(get_current_admin),
+):
+    """Send one message to many users; poll the returned job for progress."""
+    receiver_ids = await crud.get_broadcast_recipient_ids(
+        db,
+        receiver_ids=broadcast_in.receiver_ids,
+        client_status=broadcast_in.client_status,
+    )
+    return await broadcasts.start_broadcast(
+        current_admin.id, receiver_ids, broadcast_in.content
+    )
+
+
+@router.get("/broadcast/{job_id}", response_model=schemas.BroadcastJobOut)
+async def get_broadcast(job_id: str, _admin=Depends(get_current_admin)):
+    """Progress of a broadcast (readable from any worker)."""
+    job = await broadcasts.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return job
 
 
 @router.get("/{message_id}", response_model=schemas.MessageOut)
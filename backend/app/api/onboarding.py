@@ -1,6 +1,7 @@
 # backend/app/api/onboarding.py
 
-import os
+import json
+import logging
 from pathlib import Path
 from fastapi import (
     APIRouter,
@@ -11,20 +12,18 @@ from fastapi import (
     status,
     Request,
 )
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.audit import audit_log
+from app.config import get_settings
 from app.db import AsyncSessionLocal
 from app.models import User
-from app.utils import JWT_SECRET_KEY, JWT_ALGORITHM
-from app import crud
+from app.shared_state import get_shared_state
+from app.tracing import span
+from app.utils import decode_token_strict
+from app import crud, schemas
 
-# Optional: if using .env
-from dotenv import load_dotenv
-
-load_dotenv()
-
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/onboarding", tags=["onboarding"])
 
@@ -35,8 +34,8 @@ async def get_db():
         yield session
 
 
-# --- Auth helper (get current user) ---
-async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
+# --- Auth helpers (token only / current user) ---
+def get_current_user_id(request: Request) -> int:
     auth = request.headers.get("authorization")
     if not auth:
         raise HTTPException(status_code=401, detail="Missing auth header.")
@@ -46,11 +45,15 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
         raise HTTPException(status_code=401, detail="Invalid auth header.")
 
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        user_id = int(payload.get("sub"))
+        payload = decode_token_strict(token)
+        return int(payload.get("sub"))
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token.")
 
+
+async def get_current_user(
+    user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)
+):
     user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
@@ -61,20 +64,28 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
 # --- File upload route ---
 @router.post("/upload")
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Handles client KYC or document uploads."""
-    upload_dir = Path(UPLOAD_DIR)
-    upload_dir.mkdir(exist_ok=True)
+    settings = get_settings()
+    # Created lazily on first upload rather than at import time
+    upload_dir = Path(settings.upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
 
     file_path = upload_dir / f"{current_user.id}_{file.filename}"
 
     try:
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+        # Save file in bounded chunks instead of buffering the whole upload
+        with span("file.write", path=str(file_path)) as s, open(file_path, "wb") as f:
+            written = 0
+            while chunk := await file.read(settings.upload_chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+            if s:
+                s.attributes["bytes"] = written
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
 
@@ -88,7 +99,52 @@ async def upload_file(
                 file_type="kyc",
                 uploader_id=current_user.id,
             )
-        except Exception as e:
-            print("DB record save failed:", e)
+        except Exception:
+            logger.exception(
+                "DB record save failed", extra={"user_id": current_user.id}
+            )
 
+    audit_log.record(
+        "onboarding.upload", request, actor_id=current_user.id, target=file.filename
+    )
     return {"message": "✅ File uploaded successfully", "file": file.filename}
+
+
+# --- Onboarding status (client portal landing page) ---
+@router.get("/status", response_model=schemas.OnboardingStatus)
+async def onboarding_status(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """User, client row, files and checklist; cached per user.
+
+    The cache entry is dropped by crud on upload, KYC and status changes.
+    """
+    state = get_shared_state()
+    key = crud.onboarding_cache_key(user_id)
+    cached = await state.get(key)
+    if cached is not None:
+        return cached
+
+    user = await crud.get_onboarding_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+    client = user.client
+    files = sorted(user.files, key=lambda f: f.id)
+    result = schemas.OnboardingStatus(
+        user=user,
+        client=client,
+        files=files,
+        checklist=schemas.OnboardingChecklist(
+            kyc_uploaded=bool(
+                (client and client.kyc_uploaded)
+                or any(f.file_type == "kyc" for f in files)
+            ),
+            payment_verified=bool(client and client.payment_verified),
+            approval_status=(client and client.status) or "pending",
+        ),
+    )
+    await state.set(
+        key, json.loads(result.json()), ttl=get_settings().cache_ttl_seconds
+    )
+    return result
@@ -0,0 +1,240 @@
+# backend/app/archive.py
+"""Move old messages into monthly, compressed archive tables.
+
+Messages older than ARCHIVE_AFTER_DAYS are copied into
+``messages_archive_YYYYMM`` (content zlib-compressed) and deleted from
+``messages`` in small batches, one short transaction each, so the hot table
+and its indexes stay small. ``message_archive_partitions`` records which
+id range lives in which table; reads fall through to it (see
+crud.get_user_messages_page).
+
+Usage (from backend/):
+  python -m app.archive --older-than-days 365 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import logging
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    Table,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    union_all,
+)
+
+from app import models
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Archive tables are created on demand and kept out of Base.metadata/Alembic
+archive_metadata = MetaData()
+
+
+@dataclass
+class ArchivedMessage:
+    """Read model for archived rows; same fields as schemas.MessageOut."""
+
+    id: int
+    sender_id: int
+    receiver_id: int
+    content: str
+    timestamp: datetime
+
+
+def partition_table(month: str) -> Table:
+    """Table object for a "YYYY-MM" partition."""
+    name = f"messages_archive_{month.replace('-', '')}"
+    if name in archive_metadata.tables:
+        return archive_metadata.tables[name]
+    return Table(
+        name,
+        archive_metadata,
+        Column("id", Integer, primary_key=True),
+        Column("sender_id", Integer, nullable=False),
+        Column("receiver_id", Integer, nullable=False),
+        Column("content_z", LargeBinary, nullable=False),
+        Column("timestamp", DateTime),
+        Index(f"ix_{name}_sender_id", "sender_id", "id"),
+        Index(f"ix_{name}_receiver_id", "receiver_id", "id"),
+    )
+
+
+def _to_message(row) -> ArchivedMessage:
+    return ArchivedMessage(
+        id=row.id,
+        sender_id=row.sender_id,
+        receiver_id=row.receiver_id,
+        content=zlib.decompress(row.content_z).decode("utf-8"),
+        timestamp=row.timestamp,
+    )
+
+
+def archive_cutoff(older_than_days: int) -> datetime:
+    """Midnight UTC `older_than_days` ago, so whole days move together."""
+    day = datetime.now(timezone.utc).date() - timedelta(days=older_than_days)
+    return datetime.combine(day, time.min)
+
+
+async def archive_batch(db, cutoff: datetime, batch_size: int) -> int:
+    """Move up to `batch_size` of the oldest messages before `cutoff`."""
+    M = models.Message
+    rows = (
+        await db.execute(
+            select(M.id, M.sender_id, M.receiver_id, M.content, M.timestamp)
+            .where(M.timestamp < cutoff)
+            .order_by(M.timestamp, M.id)
+            .limit(batch_size)
+        )
+    ).all()
+    if not rows:
+        return 0
+
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[row.timestamp.strftime("%Y-%m")].append(row)
+
+    for month, items in by_month.items():
+        table = partition_table(month)
+        await db.run_sync(lambda s: table.create(s.connection(), checkfirst=True))
+        await db.execute(
+            insert(table),
+            [
+                {
+                    "id": r.id,
+                    "sender_id": r.sender_id,
+                    "receiver_id": r.receiver_id,
+                    "content_z": zlib.compress(r.content.encode("utf-8")),
+                    "timestamp": r.timestamp,
+                }
+                for r in items
+            ],
+        )
+        partition = await db.get(models.MessageArchivePartition, month)
+        if partition is None:
+            partition = models.MessageArchivePartition(
+                month=month, table_name=table.name, row_count=0
+            )
+            db.add(partition)
+        ids = [r.id for r in items]
+        latest = max(r.timestamp for r in items)
+        partition.row_count += len(items)
+        partition.min_id = min(ids + [partition.min_id or min(ids)])
+        partition.max_id = max(ids + [partition.max_id or 0])
+        partition.max_timestamp = max(latest, partition.max_timestamp or latest)
+        partition.updated_at = datetime.now(timezone.utc)
+
+    await db.execute(
+        delete(models.Message).where(models.Message.id.in_(r.id for r in rows))
+    )
+    await db.commit()
+    return len(rows)
+
+
+async def run_archival(
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    """Archive in batches until nothing is left (or `max_batches` ran)."""
+    settings = get_settings()
+    cutoff = archive_cutoff(older_than_days or settings.archive_after_days)
+    batch_size = batch_size or settings.archive_batch_size
+    moved = batches = 0
+    async with AsyncSessionLocal() as db:
+        while max_batches is None or batches < max_batches:
+            n = await archive_batch(db, cutoff, batch_size)
+            if not n:
+                break
+            moved += n
+            batches += 1
+            await asyncio.sleep(0)  # yield between write transactions
+    if moved:
+        logger.info(
+            "Archived messages", extra={"moved": moved, "cutoff": cutoff.isoformat()}
+        )
+    return moved
+
+
+async def scheduled_archival():
+    """Periodic job: a bounded number of batches per run."""
+    await run_archival(max_batches=get_settings().archive_max_batches_per_run)
+
+
+async def get_archived_user_messages(db, user_id: int, before_id: int, limit: int):
+    """Newest-first archived messages for a user with id < before_id.
+
+    Partition id ranges can overlap, so the partitions are merged in one
+    ordered query instead of being read one after another.
+    """
+    P = models.MessageArchivePartition
+    months = (await db.execute(select(P.month).where(P.min_id < before_id))).scalars()
+    parts = []
+    for month in months:
+        table = partition_table(month)
+        c = table.c
+        # Two index ranges per partition, as in crud.get_user_messages_page
+        parts += [
+            select(table).where(c.sender_id == user_id, c.id < before_id),
+            select(table).where(
+                c.receiver_id == user_id, c.sender_id != user_id, c.id < before_id
+            ),
+        ]
+    if not parts:
+        return []
+    rows = await db.execute(
+        union_all(*parts).order_by(literal_column("id").desc()).limit(limit)
+    )
+    return [_to_message(r) for r in rows]
+
+
+async def get_archived_message(db, message_id: int):
+    P = models.MessageArchivePartition
+    # Id ranges of monthly partitions can overlap (ids are not strictly
+    # ordered by timestamp), so look in every partition whose range matches
+    partitions = (
+        await db.execute(
+            select(P)
+            .where(P.min_id <= message_id, P.max_id >= message_id)
+            .order_by(P.month)
+        )
+    ).scalars()
+    for partition in partitions:
+        table = partition_table(partition.month)
+        row = (await db.execute(select(table).where(table.c.id == message_id))).first()
+        if row:
+            return _to_message(row)
+    return None
+
+
+async def archived_through(db):
+    """Newest archived timestamp, or None if nothing has been archived."""
+    P = models.MessageArchivePartition
+    return (await db.execute(select(func.max(P.max_timestamp)))).scalar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old messages")
+    parser.add_argument("--older-than-days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    moved = asyncio.run(
+        run_archival(args.older_than_days, args.batch_size, args.max_batches)
+    )
+    print(f"Archived {moved} messages")
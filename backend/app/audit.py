@@ -0,0 +1,257 @@
+# backend/app/audit.py
+"""Write-behind audit trail.
+
+``audit_log.record(...)`` only appends to an in-memory buffer. A background
+task inserts the buffer in batches when AUDIT_BATCH_SIZE events are waiting
+or every AUDIT_FLUSH_INTERVAL seconds, whichever comes first. Nothing is
+lost when the database is down or the buffer is full. Those events are
+appended to a spool file and replayed into the table on the next
+successful flush. Shutdown flushes whatever is left.
+
+Each worker spools to its own ``<AUDIT_SPOOL_PATH>.<pid>`` and is the only
+process that replays it. Files left by workers that have exited are
+adopted by whichever worker holds ``<AUDIT_SPOOL_PATH>.lock`` first.
+
+    audit_log.record("auth.login", request, actor_id=user.id, target=email)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import insert
+
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.logging_config import request_id_var
+from app.models import AuditEvent
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, nothing to coordinate
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    def __init__(self):
+        self._buffer: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._overflow: list[dict] = []
+        self._overflow_task: Optional[asyncio.Task] = None
+        self._spool_lock = threading.Lock()  # appends run in worker threads
+        self.flushed = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.failed_flushes = 0
+
+    @property
+    def settings(self):
+        return get_settings()
+
+    def record(
+        self,
+        event: str,
+        request=None,
+        *,
+        outcome: str = "success",
+        actor_id: Optional[int] = None,
+        target=None,
+        **details,
+    ):
+        """Queue one event; never blocks on the database."""
+        if not self.settings.audit_enabled:
+            return
+        row = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "event": event,
+            "outcome": outcome,
+            "actor_id": actor_id,
+            "target": str(target)[:256] if target is not None else None,
+            "ip": request.client.host if request and request.client else None,
+            "request_id": request_id_var.get(),
+            "details": json.dumps(details, default=str) if details else None,
+        }
+        if len(self._buffer) >= self.settings.audit_max_buffer:
+            # Bounded memory: overflow goes to the spool file, off the loop
+            self._overflow.append(row)
+            if self._overflow_task is None:
+                self._overflow_task = asyncio.create_task(self._drain_overflow())
+            return
+        self._buffer.append(row)
+        if self._wakeup and len(self._buffer) >= self.settings.audit_batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="audit-flush")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._overflow_task:
+            await self._overflow_task
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.settings.audit_flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+
+    async def _drain_overflow(self):
+        try:
+            while self._overflow:
+                rows, self._overflow = self._overflow, []
+                await asyncio.to_thread(self._spool, rows)
+        except Exception:
+            logger.exception("Audit spool write failed")
+        finally:
+            self._overflow_task = None
+
+    async def flush(self):
+        """Insert everything buffered (plus any spooled backlog) in batches."""
+        async with self._lock:
+            await self._replay_spool()
+            batch_size = self.settings.audit_batch_size
+            while self._buffer:
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(min(batch_size, len(self._buffer)))
+                ]
+                if not await self._insert(batch):
+                    await asyncio.to_thread(self._spool, batch)
+                    break
+                self.flushed += len(batch)
+
+    async def _insert(self, rows: list[dict]) -> bool:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    insert(AuditEvent),
+                    [
+                        {**r, "created_at": datetime.fromisoformat(r["created_at"])}
+                        for r in rows
+                    ],
+                )
+                await db.commit()
+            return True
+        except Exception:
+            self.failed_flushes += 1
+            logger.exception("Audit insert failed; spooling", extra={"rows": len(rows)})
+            return False
+
+    # --- Spool files (fallback when the DB is unavailable) ---
+    def _spool_file(self, suffix: str = "") -> Path:
+        path = Path(self.settings.audit_spool_path)
+        return path.with_name(f"{path.name}.{os.getpid()}{suffix}")
+
+    def _spool(self, rows: list[dict]):
+        with self._spool_lock, open(self._spool_file(), "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        self.spooled += len(rows)
+
+    def _take_spool(self) -> Optional[Path]:
+        """Move this worker's spool, and any orphaned ones, to its replay file."""
+        replaying = self._spool_file(".replay")
+        own = self._spool_file()
+        with self._spool_lock:
+            if own.exists() and not replaying.exists():
+                own.replace(replaying)
+            elif own.exists():
+                _append_file(own, replaying)
+        self._adopt_orphans(replaying)
+        return replaying if replaying.exists() else None
+
+    def _adopt_orphans(self, replaying: Path):
+        path = Path(self.settings.audit_spool_path)
+        lock_path = path.with_name(path.name + ".lock")
+        with open(lock_path, "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return  # another worker is adopting; try next flush
+            # The unsuffixed file is from versions that shared one spool
+            candidates = [path] if path.exists() else []
+            for other in path.parent.glob(path.name + ".*"):
+                pid = other.name[len(path.name) + 1 :].split(".")[0]
+                if pid.isdigit() and int(pid) != os.getpid() and not _alive(int(pid)):
+                    candidates.append(other)
+            for orphan in candidates:
+                _append_file(orphan, replaying)
+
+    async def _replay_spool(self):
+        replaying = await asyncio.to_thread(self._take_spool)
+        if replaying is None:
+            return
+        rows = []
+        for line in (await asyncio.to_thread(replaying.read_text)).splitlines():
+            try:
+                if line.strip():
+                    rows.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping truncated audit spool line")
+        batch_size = self.settings.audit_batch_size
+        for i in range(0, len(rows), batch_size):
+            if not await self._insert(rows[i : i + batch_size]):
+                # Keep what is left for the next attempt
+                remaining = "".join(json.dumps(r) + "\n" for r in rows[i:])
+                await asyncio.to_thread(replaying.write_text, remaining)
+                return
+            self.replayed += len(rows[i : i + batch_size])
+        replaying.unlink()
+
+    def snapshot(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "flushed": self.flushed,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+def _append_file(src: Path, dest: Path):
+    """Move the lines of `src` to the end of `dest`, then remove `src`."""
+    data = src.read_bytes()
+    if data and not data.endswith(b"\n"):
+        data += b"\n"  # a worker died mid-write
+    with open(dest, "ab") as f:
+        f.write(data)
+    src.unlink()
+
+
+def _alive(pid: int) -> bool:
+    if fcntl is None:
+        return False  # single process: any other pid is an earlier run
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+audit_log = AuditLog()
@@ -0,0 +1,74 @@
+# backend/app/broadcasts.py
+import asyncio
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from app import crud
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.shared_state import get_shared_state
+
+# Finished jobs stay pollable this long (from any worker)
+JOB_TTL_SECONDS = 24 * 3600
+
+
+@dataclass
+class BroadcastJob:
+    sender_id: int
+    content: str
+    total: int = 0
+    sent: int = 0
+    status: str = "queued"  # queued | running | completed | failed
+    error: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+_tasks: set[asyncio.Task] = set()
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    return await get_shared_state().get(f"broadcast:{job_id}")
+
+
+async def _save(job: BroadcastJob):
+    data = asdict(job)
+    del data["content"]
+    for key in ("created_at", "finished_at"):
+        data[key] = data[key] and data[key].isoformat()
+    await get_shared_state().set(f"broadcast:{job.id}", data, ttl=JOB_TTL_SECONDS)
+
+
+async def _run(job: BroadcastJob, receiver_ids: list[int]):
+    chunk_size = get_settings().broadcast_chunk_size
+    job.status = "running"
+    try:
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(receiver_ids), chunk_size):
+                chunk = receiver_ids[start : start + chunk_size]
+                job.sent += await crud.bulk_create_messages(
+                    db, job.sender_id, chunk, job.content
+                )
+                await _save(job)
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+        await _save(job)
+
+
+async def start_broadcast(
+    sender_id: int, receiver_ids: list[int], content: str
+) -> BroadcastJob:
+    """Queue a fan-out; messages are inserted in chunked transactions."""
+    job = BroadcastJob(sender_id=sender_id, content=content, total=len(receiver_ids))
+    await _save(job)
+    task = asyncio.create_task(_run(job, receiver_ids))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
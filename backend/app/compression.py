@@ -0,0 +1,313 @@
+# backend/app/compression.py
+"""Response compression negotiated from Accept-Encoding.
+
+gzip is always available. ``br`` and ``zstd`` need the ``brotli`` and
+``zstandard`` packages from requirements.txt. Without them only gzip is
+offered.
+"""
+
+import hashlib
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+
+try:
+    import brotli
+except ImportError:  # not installed: gzip only
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # not installed: gzip only
+    zstandard = None
+
+# Bodies of these types are already compressed (uploaded PDFs, images, archives)
+INCOMPRESSIBLE_TYPES = (
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-7z-compressed",
+    "application/zstd",
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: gzip container
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class CompressionStats:
+    """Counters for tuning levels: bytes saved vs CPU spent, per encoding."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.encodings = defaultdict(
+            lambda: {
+                "responses": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "cpu_seconds": 0.0,
+                "cache_hits": 0,
+            }
+        )
+        self.skipped = defaultdict(int)
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds, cache_hit=False):
+        e = self.encodings[encoding]
+        e["responses"] += 1
+        e["bytes_in"] += bytes_in
+        e["bytes_out"] += bytes_out
+        e["cpu_seconds"] += cpu_seconds
+        e["cache_hits"] += cache_hit
+
+    def snapshot(self) -> dict:
+        encodings = {}
+        for name, e in self.encodings.items():
+            encodings[name] = {
+                **e,
+                "bytes_saved": e["bytes_in"] - e["bytes_out"],
+                "ratio": e["bytes_out"] / e["bytes_in"] if e["bytes_in"] else None,
+                "cpu_ms_per_mb": (
+                    e["cpu_seconds"] * 1000 / (e["bytes_in"] / 1e6)
+                    if e["bytes_in"]
+                    else None
+                ),
+            }
+        return {"encodings": encodings, "skipped": dict(self.skipped)}
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        cache_max_bytes: int = 8 * 1024 * 1024,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stats = stats
+        # Server preference order when the client accepts several equally
+        self.encoders = {}
+        if zstandard is not None:
+            self.encoders["zstd"] = lambda: _ZstdEncoder(zstd_level)
+        if brotli is not None:
+            self.encoders["br"] = lambda: _BrotliEncoder(brotli_quality)
+        self.encoders["gzip"] = lambda: _GzipEncoder(gzip_level)
+        self.levels = {"zstd": zstd_level, "br": brotli_quality, "gzip": gzip_level}
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.negotiate(_header(scope["headers"], b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def negotiate(self, accept_encoding: str | None) -> str | None:
+        if not accept_encoding:
+            return None
+        accepted = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip().lower()] = q
+        best, best_q = None, 0.0
+        for name in self.encoders:
+            q = accepted.get(name, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = name, q
+        return best
+
+    def compress_body(self, encoding: str, body: bytes, cacheable: bool):
+        """One-shot compression, served from the pre-encoded cache when possible."""
+        key = None
+        if cacheable and self.cache_max_bytes:
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            key = (encoding, self.levels[encoding], digest)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats.record(encoding, len(body), len(cached), 0.0, True)
+                return cached
+        start = time.thread_time()
+        encoder = self.encoders[encoding]()
+        compressed = encoder.chunk(body) + encoder.finish()
+        self.stats.record(
+            encoding, len(body), len(compressed), time.thread_time() - start
+        )
+        if key is not None and len(compressed) <= self.cache_max_bytes:
+            self._cache[key] = compressed
+            self._cache_bytes += len(compressed)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return compressed
+
+
+class _Responder:
+    """Wraps `send` for one response; decides on the first body message."""
+
+    def __init__(self, mw: CompressionMiddleware, scope, encoding: str, send):
+        self.mw = mw
+        self.scope = scope
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.mode = None  # "identity" | "buffered" | "stream"
+        self.encoder = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.mode is None:
+            self.mode = self._choose_mode(body, more)
+            if self.mode == "identity":
+                await self._send(self.start)
+            elif self.mode == "buffered":
+                compressed = self.mw.compress_body(
+                    self.encoding, body, self._cacheable()
+                )
+                self._set_headers(len(compressed))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            else:
+                self._set_headers(None)
+                self.encoder = self.mw.encoders[self.encoding]()
+                await self._send(self.start)
+
+        if self.mode == "identity":
+            await self._send(message)
+            return
+
+        # Streaming: compress and flush each chunk so clients see progress
+        start = time.thread_time()
+        out = self.encoder.chunk(body) if body else b""
+        if not more:
+            out += self.encoder.finish()
+        self.cpu += time.thread_time() - start
+        self.bytes_in += len(body)
+        self.bytes_out += len(out)
+        await self._send({"type": "http.response.body", "body": out, "more_body": more})
+        if not more:
+            self.mw.stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu)
+
+    def _choose_mode(self, body: bytes, more: bool) -> str:
+        headers = self.start["headers"]
+        skipped = self.mw.stats.skipped
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            skipped["status"] += 1
+            return "identity"
+        if _header(headers, b"content-encoding"):
+            skipped["already_encoded"] += 1
+            return "identity"
+        content_type = (_header(headers, b"content-type") or "").lower()
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            skipped["incompressible_type"] += 1
+            return "identity"
+        if not more:
+            if len(body) < self.mw.minimum_size:
+                skipped["below_minimum_size"] += 1
+                return "identity"
+            return "buffered"
+        length = _header(headers, b"content-length")
+        if length is not None and int(length) < self.mw.minimum_size:
+            skipped["below_minimum_size"] += 1
+            return "identity"
+        return "stream"
+
+    def _cacheable(self) -> bool:
+        if self.scope["method"] not in ("GET", "HEAD") or self.start["status"] != 200:
+            return False
+        cache_control = (_header(self.start["headers"], b"cache-control") or "").lower()
+        return "no-store" not in cache_control
+
+    def _set_headers(self, content_length: int | None):
+        headers = [
+            (k, v)
+            for k, v in self.start["headers"]
+            if k.lower() not in (b"content-length", b"content-encoding")
+        ]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        vary = _header(headers, b"vary")
+        if vary is None:
+            headers.append((b"vary", b"Accept-Encoding"))
+        elif "accept-encoding" not in vary.lower():
+            headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+            headers.append((b"vary", f"{vary}, Accept-Encoding".encode()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        self.start = {**self.start, "headers": headers}
+
+
+def _header(headers, name: bytes) -> str | None:
+    for k, v in headers:
+        if k.lower() == name:
+            return v.decode("latin-1")
+    return None
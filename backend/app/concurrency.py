@@ -0,0 +1,217 @@
+# backend/app/concurrency.py
+"""Adaptive per-route-class concurrency limits with load shedding.
+
+Requests are grouped into classes (auth, upload, read, write, admin). Each
+class has its own in-flight limit that follows observed latency,
+gradient-style:
+
+    gradient = clamp(tolerance * long_rtt / short_rtt, 0.5, 1.0)
+    limit    = limit * gradient + sqrt(limit)     (smoothed, clamped)
+
+When a burst of bcrypt logins makes ``auth`` slow, only ``auth`` shrinks;
+reads keep their own slots. Requests over the limit wait in a bounded
+priority queue (authenticated reads first). A request that cannot start
+before its deadline gets 503 with Retry-After.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Optional
+
+ROUTE_CLASSES = ("auth", "upload", "read", "write", "admin")
+
+
+def classify(method: str, path: str) -> str:
+    if path.startswith("/auth"):
+        return "auth"
+    if path.startswith("/onboarding/upload"):
+        return "upload"
+    if path.startswith("/admin"):
+        return "admin"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+class Overloaded(Exception):
+    pass
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        max_queue: int = 50,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.short_rtt: Optional[float] = None  # fast EWMA, reacts to bursts
+        self.long_rtt: Optional[float] = None  # slow EWMA, the "normal" latency
+        self._waiters: list = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self, priority: int, timeout: float):
+        """Take a slot, waiting up to `timeout`; raises Overloaded otherwise."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue or timeout <= 0:
+            self.rejected += 1
+            raise Overloaded
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException as e:  # deadline passed or client went away
+            if future.done() and not future.cancelled():
+                self.release(None)  # granted just as we gave up: hand it back
+            future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise Overloaded
+            raise
+        self.admitted += 1
+
+    def release(self, latency: Optional[float]):
+        self.in_flight -= 1
+        if latency is not None:
+            self._update(latency)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # timed out / cancelled while queued
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _update(self, rtt: float):
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = rtt
+            return
+        self.short_rtt += 0.2 * (rtt - self.short_rtt)
+        self.long_rtt += 0.02 * (rtt - self.long_rtt)
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        if gradient == 1.0 and self.in_flight < self.limit / 2:
+            return  # not using the slots we have; no evidence to grow on
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for *_, f in self._waiters if not f.done()),
+            "short_rtt_ms": round(self.short_rtt * 1000, 2) if self.short_rtt else None,
+            "long_rtt_ms": round(self.long_rtt * 1000, 2) if self.long_rtt else None,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+# Live limiters by route class, for /admin/diagnostics (one set per worker)
+limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def parse_limits(raw: str) -> dict[str, int]:
+    """Parse "auth=8,upload=4" into {"auth": 8, "upload": 4}."""
+    limits = {}
+    for item in raw.split(","):
+        name, sep, value = item.strip().partition("=")
+        if sep:
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class ConcurrencyLimitMiddleware:
+    """Applies the per-class limiters; sheds with 503 + Retry-After."""
+
+    def __init__(
+        self,
+        app,
+        limits: dict[str, int],
+        min_limit: int = 2,
+        max_limit: int = 200,
+        max_queue: int = 50,
+        queue_timeout: float = 2.0,
+    ):
+        self.app = app
+        self.queue_timeout = queue_timeout
+        self.limiters = limiters
+        self.limiters.update(
+            (
+                name,
+                AdaptiveLimiter(
+                    name,
+                    initial_limit=limits.get(name, 20),
+                    min_limit=min_limit,
+                    max_limit=max_limit,
+                    max_queue=max_queue,
+                ),
+            )
+            for name in ROUTE_CLASSES
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        limiter = self.limiters[route_class]
+        authenticated = any(k == b"authorization" for k, _ in scope["headers"])
+        priority = 0 if route_class == "read" and authenticated else 1
+        try:
+            await limiter.acquire(priority, self.queue_timeout)
+        except Overloaded:
+            await self._reject(send, route_class)
+            return
+
+        start = time.perf_counter()
+        latency = None
+        try:
+            await self.app(scope, receive, send)
+            latency = time.perf_counter() - start
+        finally:
+            # Failed requests free their slot without skewing the latency signal
+            limiter.release(latency)
+
+    async def _reject(self, send, route_class: str):
+        body = json.dumps(
+            {"detail": "Server is overloaded, retry later.", "class": route_class}
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (
+                        b"retry-after",
+                        str(max(1, math.ceil(self.queue_timeout))).encode(),
+                    ),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,188 @@
+# backend/app/config.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseSettings
+from sqlalchemy.engine import make_url
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_CORS_ORIGINS = (
+    "http://localhost:3000,http://127.0.0.1:3000,"
+    "http://www.eranoconsultinggh.local,"
+    "http://clients.eranoconsultinggh.local,"
+    "http://admin.eranoconsultinggh.local"
+)
+
+# Never echoed back by the diagnostics endpoint
+SECRET_FIELDS = {"jwt_secret_key", "smtp_password"}
+
+
+class Settings(BaseSettings):
+    """Application settings, read once from the environment and backend/.env
+
+    Every tunable lives here; field names map to upper-case env vars
+    (e.g. ``db_pool_size`` <- ``DB_POOL_SIZE``).
+    """
+
+    database_url: str = "sqlite+aiosqlite:///./erano.db"
+
+    # Auth
+    jwt_secret_key: str = "change_me_in_production"
+    jwt_algorithm: str = "HS256"
+    access_token_expire_minutes: int = 60
+    refresh_token_expire_days: int = 30
+    # bcrypt cost for new hashes; pick it with `python -m app.passwords calibrate`
+    bcrypt_rounds: int = 12
+    bcrypt_rehash_on_login: bool = True  # rewrite hashes made at another cost
+    bcrypt_max_pending_rehashes: int = 4  # concurrent rehashes per worker
+
+    upload_dir: str = "./uploads"
+    cors_origins: str = DEFAULT_CORS_ORIGINS
+
+    # Boot behaviour
+    verify_schema: bool = True  # compare DB revision against Alembic head
+    startup_profile: bool = False  # print per-module import/startup timings
+
+    # Performance knobs
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # seconds to wait for a pooled connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    cache_ttl_seconds: int = 30  # default TTL for cached read models
+    upload_chunk_size: int = 1024 * 1024  # bytes read per chunk on upload
+    web_concurrency: int = 0  # worker processes; 0 = one per CPU core
+    bind: str = "127.0.0.1:8000"  # gunicorn listen address (gunicorn.conf.py)
+    login_rate_limit_per_minute: int = 0  # per client IP on /auth/login; 0 = off
+    broadcast_chunk_size: int = 500  # messages per transaction on fan-out
+    stats_reconcile_interval_seconds: int = 3600  # 0 disables the job
+    archive_after_days: int = 365  # messages older than this move to archive
+    archive_batch_size: int = 500  # messages moved per transaction
+    archive_interval_seconds: int = 0  # 0 disables the scheduled job
+    archive_max_batches_per_run: int = 100
+
+    # SQLite maintenance and backups (see app/maintenance.py)
+    backup_dir: str = "./backups"
+    backup_pages_per_step: int = 256  # pages copied per backup step
+    backup_step_sleep: float = 0.05  # seconds between steps (lets writers in)
+    backup_max_restarts: int = 3  # then fall back to one VACUUM INTO snapshot
+    incremental_vacuum_pages: int = 1000  # free pages released per run (>= 1)
+    sqlite_analysis_limit: int = 1000  # rows sampled per index by ANALYZE
+    maintenance_interval_seconds: int = 0  # 0 disables the scheduled job
+
+    # Idempotency-Key handling for retried POSTs (see app/idempotency.py)
+    idempotency_enabled: bool = True
+    idempotency_paths: str = "/messages/,/onboarding/upload"
+    idempotency_ttl_seconds: int = 86400  # how long responses can be replayed
+    idempotency_lock_seconds: int = 60  # in-flight claim, if a worker dies
+    idempotency_wait_seconds: float = 10.0  # duplicates wait, then get 409
+
+    # Adaptive concurrency limits per route class (see app/concurrency.py)
+    concurrency_limit_enabled: bool = True
+    concurrency_limits: str = "auth=8,upload=4,read=64,write=16,admin=8"
+    concurrency_min_limit: int = 2
+    concurrency_max_limit: int = 200
+    concurrency_queue_size: int = 50  # waiting requests per class
+    concurrency_queue_timeout: float = 2.0  # seconds before 503
+
+    # Audit trail (see app/audit.py; GET /admin/audit)
+    audit_enabled: bool = True
+    audit_batch_size: int = 200  # flush when this many events are waiting
+    audit_flush_interval: float = 1.0  # ...or after this many seconds
+    audit_max_buffer: int = 10000  # events held in memory per worker
+    audit_spool_path: str = "./audit_spool.jsonl"  # fallback when DB is down
+
+    # Email notifications via the outbox (see app/notifications.py).
+    # Nothing is queued or sent unless SMTP_HOST is set.
+    smtp_host: Optional[str] = None
+    smtp_port: int = 25
+    smtp_username: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_starttls: bool = False
+    smtp_from: str = "no-reply@eranoconsultinggh.local"
+    smtp_timeout: float = 10.0
+    smtp_pool_size: int = 2  # persistent connections per worker
+    outbox_batch_size: int = 200  # events claimed per dispatcher run
+    outbox_poll_interval: float = 2.0
+    outbox_claim_timeout: int = 300  # seconds before a stuck claim is retaken
+    outbox_max_attempts: int = 8
+    outbox_retry_base_seconds: int = 30  # doubled on every failed attempt
+    outbox_retry_max_seconds: int = 3600
+
+    # Request tracing (see app/tracing.py; GET /admin/traces)
+    trace_sample_rate: float = 0.01  # fraction of requests traced
+    trace_buffer_size: int = 200  # recent traces kept in memory
+    trace_export_path: Optional[str] = None  # append JSON lines when set
+
+    # Logging (see app/logging_config.py)
+    log_level: str = "INFO"  # for the app.* logger tree
+    log_levels: str = ""  # per module, e.g. "app.shared_state=WARNING"
+    log_sampling: str = "auth.invalid_token=0.1"  # event=fraction kept
+    log_queue_size: int = 10000  # records buffered before dropping
+
+    # Response compression (see app/compression.py)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # bytes; smaller bodies go out as-is
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_cache_max_bytes: int = 8 * 1024 * 1024  # pre-encoded bodies
+
+    # State shared across worker processes (see app/shared_state.py)
+    shared_state_backend: str = "memory"  # memory | sqlite
+    shared_state_path: str = "./shared_state.db"
+
+    class Config:
+        env_file = BASE_DIR / ".env"
+
+    @property
+    def cors_origin_list(self) -> list[str]:
+        return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
+
+    @property
+    def idempotency_path_set(self) -> set[str]:
+        return {p.strip() for p in self.idempotency_paths.split(",") if p.strip()}
+
+    def public_dict(self) -> dict:
+        """Resolved settings with secrets and DB credentials masked."""
+        data = self.dict()
+        for field in SECRET_FIELDS:
+            data[field] = "***"
+        data["database_url"] = make_url(self.database_url).render_as_string(
+            hide_password=True
+        )
+        return data
+
+
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """Process-wide settings, loaded on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def reset_settings():
+    """Drop the cached settings so the next call re-reads the environment."""
+    global _settings
+    _settings = None
+
+
+@contextmanager
+def override_settings(**changes):
+    """Temporarily replace settings values, e.g. inside a single test.
+
+    Engine/pool settings are read when app.db is imported, so overriding
+    ``database_url`` or ``db_pool_*`` here does not rebuild the engine.
+    """
+    global _settings
+    previous = get_settings()
+    _settings = Settings(**{**previous.dict(), **changes})
+    try:
+        yield _settings
+    finally:
+        _settings = previous
@@ -1,13 +1,175 @@
 # backend/app/crud.py
+import asyncio
+import json
 from sqlalchemy.future import select
-from sqlalchemy import insert
+from sqlalchemy import case, delete, func, insert, text, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from . import models, utils
+from sqlalchemy.orm import joinedload
+from . import archive, models, passwords, utils
+from .config import get_settings
+from .shared_state import get_shared_state
 from .models import Message
-from datetime import datetime
-from .models import RefreshToken, User
+from datetime import date, datetime, timedelta, timezone
+from .models import DailyStat, RefreshToken, StatCounter, User
 from app.utils import verify_password
 
+CLIENT_STATUSES = ("pending", "active", "rejected")
+
+
+# --- Dashboard stats: bumped inside the caller's transaction, before commit ---
+def _is_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _upsert_insert(db: AsyncSession):
+    if _is_postgres(db):
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+async def bump_stats(
+    db: AsyncSession, counters: dict[str, int] = None, daily: dict[str, int] = None
+):
+    """Add deltas to stat_counters / today's daily_stats without committing."""
+    dialect_insert = _upsert_insert(db)
+    greatest = func.greatest if _is_postgres(db) else func.max
+    for name, delta in (counters or {}).items():
+        # Clamped at zero: a decrement against a counter that has drifted
+        # low must not go negative before the next reconcile fixes it
+        stmt = dialect_insert(StatCounter).values(name=name, value=max(delta, 0))
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[StatCounter.name],
+                set_={"value": greatest(StatCounter.value + delta, 0)},
+            )
+        )
+    today = datetime.now(timezone.utc).date()
+    for metric, delta in (daily or {}).items():
+        stmt = dialect_insert(DailyStat).values(day=today, metric=metric, count=delta)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[DailyStat.day, DailyStat.metric],
+                set_={"count": DailyStat.count + stmt.excluded.count},
+            )
+        )
+
+
+async def get_stats(db: AsyncSession, days: int = 30):
+    """Read the rollups: a handful of counter rows plus `days` x metrics rows."""
+    counters = {
+        c.name: c.value for c in (await db.execute(select(StatCounter))).scalars()
+    }
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    res = await db.execute(
+        select(DailyStat).where(DailyStat.day >= since).order_by(DailyStat.day)
+    )
+    return counters, res.scalars().all()
+
+
+async def _lock_stats(db: AsyncSession):
+    """Block concurrent bump_stats() until this transaction commits."""
+    if _is_postgres(db):
+        await db.execute(
+            text("LOCK TABLE stat_counters, daily_stats IN SHARE ROW EXCLUSIVE MODE")
+        )
+    else:
+        # Any write takes SQLite's database write lock for the transaction
+        await db.execute(
+            update(StatCounter)
+            .where(StatCounter.name == "clients.total")
+            .values(value=StatCounter.value)
+        )
+
+
+async def reconcile_stats(db: AsyncSession):
+    """Recompute every rollup from the base tables and overwrite the stored rows.
+
+    One transaction: the write lock is taken before the base tables are
+    read, so a bump committed meanwhile is either counted or waits.
+    """
+    await _lock_stats(db)
+    counters = {
+        "clients.total": 0,
+        "clients.kyc_uploaded": 0,
+        "clients.payment_verified": 0,
+    }
+    counters.update({f"clients.status.{s}": 0 for s in CLIENT_STATUSES})
+    rows = await db.execute(
+        select(
+            models.Client.status,
+            func.count(),
+            func.sum(case((models.Client.kyc_uploaded.is_(True), 1), else_=0)),
+            func.sum(case((models.Client.payment_verified.is_(True), 1), else_=0)),
+        ).group_by(models.Client.status)
+    )
+    for status, total, kyc, paid in rows:
+        key = f"clients.status.{status or 'pending'}"
+        counters[key] = counters.get(key, 0) + total
+        counters["clients.total"] += total
+        counters["clients.kyc_uploaded"] += kyc or 0
+        counters["clients.payment_verified"] += paid or 0
+
+    # Archived messages are gone from the hot table; keep their stored days
+    archived = await archive.archived_through(db)
+    frozen_through = archived.date() if archived else None
+
+    daily = []
+    for metric, column in (
+        ("signups", models.Client.created_at),
+        ("uploads", models.FileRecord.uploaded_at),
+        ("messages", models.Message.timestamp),
+    ):
+        day = func.date(column)
+        q = select(day, func.count()).where(column.is_not(None)).group_by(day)
+        if metric == "messages" and frozen_through:
+            q = q.where(day > frozen_through.isoformat())
+        res = await db.execute(q)
+        daily += [
+            {"day": date.fromisoformat(str(d)), "metric": metric, "count": n}
+            for d, n in res
+        ]
+
+    # Overwrite only what differs; nothing is deleted and re-inserted
+    dialect_insert = _upsert_insert(db)
+    stored = dict((await db.execute(select(StatCounter.name, StatCounter.value))).all())
+    for name, value in counters.items():
+        if stored.get(name) != value:
+            stmt = dialect_insert(StatCounter).values(name=name, value=value)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[StatCounter.name], set_={"value": value}
+                )
+            )
+    for name in stored.keys() - counters.keys():
+        await db.execute(delete(StatCounter).where(StatCounter.name == name))
+
+    wanted = {(r["day"], r["metric"]): r["count"] for r in daily}
+    stored = {
+        (day, metric): count
+        for day, metric, count in await db.execute(
+            select(DailyStat.day, DailyStat.metric, DailyStat.count)
+        )
+    }
+    for (day, metric), count in wanted.items():
+        if stored.get((day, metric)) != count:
+            stmt = dialect_insert(DailyStat).values(day=day, metric=metric, count=count)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[DailyStat.day, DailyStat.metric],
+                    set_={"count": count},
+                )
+            )
+    for day, metric in stored.keys() - wanted.keys():
+        if metric == "messages" and frozen_through and day <= frozen_through:
+            continue  # archived messages keep their stored days
+        await db.execute(
+            delete(DailyStat).where(DailyStat.day == day, DailyStat.metric == metric)
+        )
+    await db.commit()
+    return counters
+
 
 async def get_user_by_id(db: AsyncSession, user_id: int):
     return await db.get(User, user_id)
@@ -49,11 +211,11 @@ async def create_user(
     db: AsyncSession, email: str, password: str, role: str = "client"
 ):
     hashed = utils.hash_password(password)
-    user = models.User(email=user.email, hashed_password=hashed, role=role)
+    user = models.User(email=email, hashed_password=hashed, role=role)
     db.add(user)
     await db.commit()
     await db.refresh(user)
-    return new_user
+    return user
 
 
 async def create_client_for_user(
@@ -71,11 +233,49 @@ async def create_client_for_user(
         contact_email=None,
     )
     db.add(client)
+    await bump_stats(
+        db,
+        counters={
+            "clients.total": 1,
+            f"clients.status.{client.status or 'pending'}": 1,
+        },
+        daily={"signups": 1},
+    )
     await db.commit()
     await db.refresh(client)
+    await invalidate_onboarding_status(user_id)
     return client
 
 
+async def get_onboarding_user(db: AsyncSession, user_id: int):
+    """User with client row and files, loaded in a single joined query."""
+    res = await db.execute(
+        select(User)
+        .options(joinedload(User.client), joinedload(User.files))
+        .where(User.id == user_id)
+    )
+    return res.unique().scalar_one_or_none()
+
+
+def onboarding_cache_key(user_id: int) -> str:
+    return f"onboarding:status:{user_id}"
+
+
+async def invalidate_onboarding_status(user_id: int):
+    await get_shared_state().delete(onboarding_cache_key(user_id))
+
+
+def add_notification(db: AsyncSession, recipient_id: int, kind: str, **payload):
+    """Queue an outbox row in the caller's transaction (sent after commit)."""
+    if recipient_id is None or not get_settings().smtp_host:
+        return
+    db.add(
+        models.OutboxEvent(
+            recipient_id=recipient_id, kind=kind, payload=json.dumps(payload)
+        )
+    )
+
+
 async def list_clients(db: AsyncSession, limit: int = 100):
     q = select(models.Client).order_by(models.Client.created_at.desc()).limit(limit)
     res = await db.execute(q)
@@ -86,12 +286,37 @@ async def mark_kyc_uploaded(db: AsyncSession, client_id: int):
     q = await db.get(models.Client, client_id)
     if not q:
         return None
+    if not q.kyc_uploaded:
+        await bump_stats(db, counters={"clients.kyc_uploaded": 1})
     q.kyc_uploaded = True
     await db.commit()
     await db.refresh(q)
+    await invalidate_onboarding_status(q.user_id)
     return q
 
 
+async def set_client_status(db: AsyncSession, client_id: int, status: str):
+    client = await db.get(models.Client, client_id)
+    if not client:
+        return None
+    previous = client.status or "pending"
+    if previous != status:
+        await bump_stats(
+            db,
+            counters={
+                f"clients.status.{previous}": -1,
+                f"clients.status.{status}": 1,
+            },
+        )
+    client.status = status
+    if previous != status:
+        add_notification(db, client.user_id, "client_status", status=status)
+    await db.commit()
+    await db.refresh(client)
+    await invalidate_onboarding_status(client.user_id)
+    return client
+
+
 async def save_file_record(
     db: AsyncSession, filename: str, path: str, file_type: str, uploader_id: int
 ):
@@ -99,29 +324,37 @@ async def save_file_record(
         filename=filename, path=path, file_type=file_type, uploader_id=uploader_id
     )
     db.add(rec)
+    await bump_stats(db, daily={"uploads": 1})
     await db.commit()
     await db.refresh(rec)
+    await invalidate_onboarding_status(uploader_id)
     return rec
 
 
 async def create_message(db, sender_id: int, receiver_id: int, content: str):
     msg = Message(sender_id=sender_id, receiver_id=receiver_id, content=content)
     db.add(msg)
+    await bump_stats(db, daily={"messages": 1})
+    add_notification(db, receiver_id, "message", sender_id=sender_id)
     await db.commit()
     await db.refresh(msg)
     return msg
 
 
 async def get_conversation(db, user_a: int, user_b: int):
-    q = (
-        select(Message)
-        .where(
-            ((Message.sender_id == user_a) & (Message.receiver_id == user_b))
-            | ((Message.sender_id == user_b) & (Message.receiver_id == user_a))
-        )
-        .order_by(Message.timestamp.asc())
-    )
-    res = await db.execute(q)
+    # One index range per direction, merged in order (an OR would need a
+    # sort); the `!=` stops notes-to-self from being read twice
+    q = union_all(
+        select(Message).where(
+            Message.sender_id == user_a, Message.receiver_id == user_b
+        ),
+        select(Message).where(
+            Message.sender_id == user_b,
+            Message.receiver_id == user_a,
+            Message.sender_id != user_a,
+        ),
+    ).order_by(Message.timestamp.asc())
+    res = await db.execute(select(Message).from_statement(q))
     return res.scalars().all()
 
 
@@ -136,8 +369,12 @@ async def authenticate_user(db, email: str, password: str):
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is CPU-bound: keep it off the event loop so other routes keep moving
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
+    if utils.get_pwd_context().needs_update(user.hashed_password):
+        # Cost policy changed since this hash was made; rewrite it after the reply
+        passwords.schedule_rehash(user.id, password, user.hashed_password)
 
     return user
 
@@ -155,23 +392,115 @@ async def create_message(db, message_in: schemas.MessageCreate, sender_id: int):
         content=message_in.content,
     )
     db.add(new_message)
+    await bump_stats(db, daily={"messages": 1})
+    add_notification(db, message_in.receiver_id, "message", sender_id=sender_id)
     await db.commit()
     await db.refresh(new_message)
     return new_message
 
 
-async def get_user_messages(db, user_id: int):
+async def get_message_by_id(db, message_id: int):
     result = await db.execute(
-        select(models.Message).where(
-            (models.Message.sender_id == user_id)
-            | (models.Message.receiver_id == user_id)
-        )
+        select(models.Message).where(models.Message.id == message_id)
+    )
+    return result.scalar_one_or_none() or await archive.get_archived_message(
+        db, message_id
     )
-    return result.scalars().all()
 
 
-async def get_message_by_id(db, message_id: int):
-    result = await db.execute(
-        select(models.Message).where(models.Message.id == message_id)
+async def get_user_messages_page(
+    db, user_id: int, before_id: int | None = None, limit: int = 100
+):
+    """Newest-first page of a user's messages; continues into the archive."""
+    M = models.Message
+    sent = select(M).where(M.sender_id == user_id)
+    received = select(M).where(M.receiver_id == user_id, M.sender_id != user_id)
+    if before_id is not None:
+        sent, received = sent.where(M.id < before_id), received.where(M.id < before_id)
+    # Sent and received are each read in id order from their own index and
+    # merged; `sender_id != user_id` keeps notes-to-self from appearing twice
+    q = union_all(sent, received).order_by(M.id.desc()).limit(limit)
+    page = list((await db.execute(select(M).from_statement(q))).scalars().all())
+    if len(page) < limit:
+        cursor = page[-1].id if page else before_id
+        page += await archive.get_archived_user_messages(
+            db, user_id, cursor if cursor is not None else 2**63 - 1, limit - len(page)
+        )
+    return page
+
+
+async def list_audit_events(
+    db: AsyncSession,
+    event: str | None = None,
+    actor_id: int | None = None,
+    before_id: int | None = None,
+    limit: int = 100,
+):
+    """Newest-first page of the audit trail (keyset on id)."""
+    q = select(models.AuditEvent).order_by(models.AuditEvent.id.desc()).limit(limit)
+    if event:
+        q = q.where(models.AuditEvent.event == event)
+    if actor_id is not None:
+        q = q.where(models.AuditEvent.actor_id == actor_id)
+    if before_id is not None:
+        q = q.where(models.AuditEvent.id < before_id)
+    return (await db.execute(q)).scalars().all()
+
+
+async def get_broadcast_recipient_ids(
+    db, receiver_ids: list[int] | None = None, client_status: str | None = None
+) -> list[int]:
+    """Resolve a broadcast audience to active user ids (explicit list or client filter)."""
+    q = select(models.User.id).where(models.User.is_active.is_(True))
+    order = models.User.id
+    if receiver_ids is not None:
+        q = q.where(models.User.id.in_(set(receiver_ids)))
+    if client_status is not None:
+        q = q.join(models.Client, models.Client.user_id == models.User.id).where(
+            models.Client.status == client_status
+        )
+        # Same ids, but already in order in ix_clients_status (status, user_id)
+        order = models.Client.user_id
+    result = await db.execute(q.order_by(order))
+    return list(result.scalars().all())
+
+
+async def bulk_create_messages(
+    db, sender_id: int, receiver_ids: list[int], content: str
+) -> int:
+    """Insert one message per receiver with a single executemany and commit."""
+    if not receiver_ids:
+        return 0
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        insert(models.Message),
+        [
+            {
+                "sender_id": sender_id,
+                "receiver_id": receiver_id,
+                "content": content,
+                "timestamp": now,
+            }
+            for receiver_id in receiver_ids
+        ],
     )
-    return result.scalar_one_or_none()
+    await bump_stats(db, daily={"messages": len(receiver_ids)})
+    if get_settings().smtp_host:
+        payload = json.dumps({"sender_id": sender_id})
+        await db.execute(
+            insert(models.OutboxEvent),
+            [
+                {
+                    "recipient_id": receiver_id,
+                    "kind": "message",
+                    "payload": payload,
+                    "status": "pending",
+                    "attempts": 0,
+                    "created_at": now,
+                    "next_attempt_at": now,
+                }
+                for receiver_id in receiver_ids
+            ],
+        )
+    await db.commit()
+    return len(receiver_ids)
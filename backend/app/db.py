@@ -1,17 +1,40 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
-import os
+from .config import BASE_DIR, get_settings
+
+DATABASE_URL = get_settings().database_url
+
+
+def _engine_options(settings) -> dict:
+    """Pool sizing from settings; in-memory SQLite uses a single shared conn."""
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    }
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./erano.db")
 
 # --- Create async engine ---
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+engine = create_async_engine(
+    DATABASE_URL, echo=False, future=True, **_engine_options(get_settings())
+)
 
 # --- Session maker ---
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, expire_on_commit=False, class_=AsyncSession
 )
 
+_REVISION_RE = re.compile(r"^revision(?::[^=]*)?=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision(?::[^=]*)?=\s*(.+)$", re.M)
+
 # --- Base class for models ---
 Base = declarative_base()
 
@@ -25,7 +48,54 @@ async def get_db():
             await session.close()
 
 
-# Optional: to initialize the database at startup
+# Optional: create tables directly (one-off scripts only; the app uses Alembic)
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+def sync_database_url(url: str | None = None) -> str:
+    """Blocking-driver form of the DB URL (for Alembic and CLI tools)."""
+    u = make_url(url or get_settings().database_url)
+    return u.set(drivername=u.drivername.split("+", 1)[0]).render_as_string(
+        hide_password=False
+    )
+
+
+def alembic_head() -> str | None:
+    """Latest revision in backend/migrations/versions.
+
+    Reads the revision headers directly; importing alembic's script machinery
+    costs more than the rest of the boot check put together.
+    """
+    revisions, parents = set(), set()
+    for path in (BASE_DIR / "migrations" / "versions").glob("*.py"):
+        source = path.read_text()
+        rev = _REVISION_RE.search(source)
+        if rev:
+            revisions.add(rev.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down:
+            parents.update(re.findall(r"['\"]([0-9a-zA-Z_]+)['\"]", down.group(1)))
+    heads = revisions - parents
+    if len(heads) > 1:
+        raise RuntimeError(f"Multiple Alembic heads: {sorted(heads)}")
+    return heads.pop() if heads else None
+
+
+async def verify_schema_version():
+    """Fast boot check: one SELECT on alembic_version instead of create_all."""
+    async with engine.connect() as conn:
+        try:
+            current = (
+                await conn.execute(text("SELECT version_num FROM alembic_version"))
+            ).scalar()
+        except OperationalError:  # table missing: never migrated
+            current = None
+    head = alembic_head()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current!r}, expected {head!r}. "
+            "Run `alembic upgrade head` from backend/."
+        )
+    return current
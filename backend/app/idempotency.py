@@ -0,0 +1,331 @@
+# backend/app/idempotency.py
+"""Idempotency-Key support for retried POSTs.
+
+A client that times out and retries sends the same ``Idempotency-Key``
+header. Keys are scoped to the authenticated user and the path. Records
+live in the shared state store, so every worker sees them:
+
+    idem:<digest>        the stored response (status, content type, body);
+                         kept IDEMPOTENCY_TTL_SECONDS
+    idem:<digest>:lock   held while the first request runs; expires after
+                         IDEMPOTENCY_LOCK_SECONDS if its worker dies
+
+A duplicate of a completed request gets the stored response back with
+``Idempotent-Replayed: true``. A duplicate that arrives while the first is
+still running waits for it (single-flight) instead of running again, and
+gets 409 if the first one is not done within IDEMPOTENCY_WAIT_SECONDS.
+Reusing a key with a different request body gets 422. 5xx responses are
+not stored, so a retry after a server error runs again.
+
+Uploads are fingerprinted by hashing the whole body with the multipart
+boundary removed (it differs between retries). The body is spooled to a
+temporary file while it is hashed and replayed to the route from there,
+so an upload with a key needs a Content-Length (411 otherwise).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import tempfile
+from typing import Optional
+
+from jose import JWTError
+
+from app.shared_state import get_shared_state
+from app.utils import decode_token_strict
+
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 64 * 1024  # larger responses are not replayable
+POLL_INTERVAL = 0.05  # seconds, while waiting on another worker
+SPOOL_MEMORY_LIMIT = 1024 * 1024  # larger request bodies spool to disk
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+class IdempotencyMiddleware:
+    """Single-flight and response replay for POSTs to `paths`."""
+
+    def __init__(
+        self,
+        app,
+        paths: set[str],
+        ttl: float = 86400,
+        lock_ttl: float = 60,
+        wait_timeout: float = 10.0,
+    ):
+        self.app = app
+        self.paths = paths
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        # Requests in flight in this worker; duplicates await the future
+        self._flights: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key", b"").decode("latin-1").strip()
+        subject = self._subject(headers.get(b"authorization", b""))
+        if not key or subject is None:
+            # Anonymous requests are rejected by the route itself
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": "Idempotency-Key is too long."})
+            return
+
+        content_type = headers.get(b"content-type", b"")
+        if content_type.startswith(b"application/json"):
+            receive, fingerprint = await _fingerprint_json(receive)
+            if fingerprint is not None:
+                await self._handle(scope, receive, send, subject, key, fingerprint)
+            return
+        if b"content-length" not in headers:
+            await _send_json(
+                send,
+                411,
+                {"detail": "Content-Length is required with an Idempotency-Key."},
+            )
+            return
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT) as spool:
+            receive, fingerprint = await _fingerprint_spooled(
+                receive, spool, _boundary(content_type)
+            )
+            if fingerprint is not None:
+                await self._handle(scope, receive, send, subject, key, fingerprint)
+
+    async def _handle(self, scope, receive, send, subject, key, fingerprint):
+        digest = hashlib.sha256(
+            f"{subject}|{scope['path']}|{key}".encode()
+        ).hexdigest()[:32]
+        record_key = f"idem:{digest}"
+        state = get_shared_state()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        record = await state.get(record_key)
+        while record is None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            flight = self._flights.get(record_key)
+            if flight is not None:
+                # Same worker: wait for the first request to finish
+                await asyncio.wait({flight}, timeout=remaining)
+            elif await state.incr(f"{record_key}:lock", ttl=self.lock_ttl) == 1:
+                await self._execute(scope, receive, send, record_key, fingerprint)
+                return
+            else:
+                # Another worker holds the lock; poll for its result
+                await asyncio.sleep(POLL_INTERVAL)
+            # None again if the first attempt was not stored (5xx): retry it
+            record = await state.get(record_key)
+        if record is None:
+            await _send_json(
+                send,
+                409,
+                {"detail": "A request with this Idempotency-Key is in progress."},
+                retry_after=1,
+            )
+            return
+        await self._replay(send, record, fingerprint)
+
+    @staticmethod
+    def _subject(authorization: bytes) -> Optional[str]:
+        scheme, _, token = authorization.decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return str(decode_token_strict(token).get("sub"))
+        except JWTError:
+            return None
+
+    async def _execute(self, scope, receive, send, record_key, fingerprint):
+        state = get_shared_state()
+        # It may have finished between our first lookup and taking the lock
+        record = await state.get(record_key)
+        if record is not None:
+            await state.delete(f"{record_key}:lock")
+            await self._replay(send, record, fingerprint)
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[record_key] = flight
+        response = {"status": 500, "content_type": None, "body": []}
+        size = 0
+
+        async def capture(message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for k, v in message.get("headers", []):
+                    if k.lower() == b"content-type":
+                        response["content_type"] = v.decode("latin-1")
+            elif message["type"] == "http.response.body" and size <= MAX_STORED_BODY:
+                body = message.get("body", b"")
+                size += len(body)
+                response["body"].append(body)
+            await send(message)
+
+        disconnected = False
+
+        async def watch():
+            nonlocal disconnected
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+            return message
+
+        try:
+            await self.app(scope, watch, capture)
+            # A route that saw the client leave may have answered a partial
+            # request; a retry must run again rather than replay that
+            if (
+                not disconnected
+                and response["status"] < 500
+                and size <= MAX_STORED_BODY
+            ):
+                record = {
+                    "fingerprint": fingerprint,
+                    "status": response["status"],
+                    "content_type": response["content_type"],
+                    "body": base64.b64encode(b"".join(response["body"])).decode(),
+                }
+                await state.set(record_key, record, ttl=self.ttl)
+        finally:
+            await state.delete(f"{record_key}:lock")
+            del self._flights[record_key]
+            flight.set_result(None)
+
+    @staticmethod
+    async def _replay(send, record: dict, fingerprint: str):
+        if record["fingerprint"] != fingerprint:
+            await _send_json(
+                send,
+                422,
+                {"detail": "Idempotency-Key was already used for a different request."},
+            )
+            return
+        body = base64.b64decode(record["body"])
+        headers = [
+            (b"content-length", str(len(body)).encode()),
+            (b"idempotent-replayed", b"true"),
+        ]
+        if record["content_type"]:
+            headers.append((b"content-type", record["content_type"].encode()))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": record["status"],
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, payload: dict, retry_after: int = 0):
+    body = json.dumps(payload).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if retry_after:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _fingerprint_json(receive):
+    """Buffer a (small) JSON body; return a receive that replays it and its hash.
+
+    The hash is None if the client disconnected before sending the whole body.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return receive, None  # truncated body: don't run or record it
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay_body():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()  # http.disconnect
+
+    return replay_body, hashlib.sha256(body).hexdigest()
+
+
+async def _fingerprint_spooled(receive, spool, boundary: bytes):
+    """Copy the body into `spool` while hashing it without the boundary.
+
+    The hash is None if the client disconnected before sending the whole body.
+    """
+    digest = _BoundaryFreeHash(boundary)
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return receive, None  # truncated body: don't run or record it
+        chunk = message.get("body", b"")
+        spool.write(chunk)
+        digest.update(chunk)
+        if not message.get("more_body"):
+            break
+    spool.seek(0)
+    done = False
+
+    async def replay_body():
+        nonlocal done
+        if done:
+            return await receive()  # http.disconnect
+        chunk = spool.read(SPOOL_CHUNK_SIZE)
+        done = len(chunk) < SPOOL_CHUNK_SIZE
+        return {"type": "http.request", "body": chunk, "more_body": not done}
+
+    return replay_body, digest.hexdigest()
+
+
+def _boundary(content_type: bytes) -> bytes:
+    for param in content_type.split(b";")[1:]:
+        name, _, value = param.strip().partition(b"=")
+        if name.lower() == b"boundary":
+            return b"--" + value.strip(b'"')
+    return b""
+
+
+class _BoundaryFreeHash:
+    """sha256 of a stream with every occurrence of `boundary` removed.
+
+    The last len(boundary) - 1 bytes are held back, so a boundary split
+    across two chunks is still removed.
+    """
+
+    def __init__(self, boundary: bytes):
+        self._boundary = boundary
+        self._hold = max(len(boundary) - 1, 0)
+        self._tail = b""
+        self._hash = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        data = self._tail + chunk
+        if self._boundary:
+            data = data.replace(self._boundary, b"")
+        cut = max(len(data) - self._hold, 0)
+        self._hash.update(data[:cut])
+        self._tail = data[cut:]
+
+    def hexdigest(self) -> str:
+        self._hash.update(self._tail)
+        self._tail = b""
+        return self._hash.hexdigest()
@@ -0,0 +1,178 @@
+# backend/app/logging_config.py
+"""Structured JSON logging that keeps I/O off the event loop.
+
+Loggers under ``app.*`` hand records to a bounded queue; a background
+thread formats them as JSON lines and writes them out. The request path
+only pays for an enqueue.
+
+    logger = logging.getLogger(__name__)
+    logger.warning("Invalid token", extra={"sample": "auth.invalid_token"})
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+    "sample",
+    "sample_rate",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        if getattr(record, "sample_rate", None) is not None:
+            data["sample_rate"] = record.sample_rate
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records tagged ``extra={"sample": "<event>"}``."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "sample", None)
+        if event is None or event not in self.rates:
+            return True
+        rate = self.rates[event]
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue without formatting; drop (and count) when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Context vars are per-task: capture the id here, before the hand-off
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_handler: NonBlockingQueueHandler | None = None
+_listener: logging.handlers.QueueListener | None = None
+_queue_size = 10000
+
+
+def _parse_pairs(raw: str) -> dict[str, str]:
+    pairs = {}
+    for item in raw.split(","):
+        name, sep, value = item.strip().partition("=")
+        if sep:
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def _start_listener():
+    global _listener
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    _handler.queue = queue.Queue(maxsize=_queue_size)
+    _listener = logging.handlers.QueueListener(_handler.queue, writer)
+    _listener.start()
+
+
+def configure_logging(settings):
+    """Install the queue handler on the ``app`` logger tree (idempotent)."""
+    global _handler, _queue_size
+    if _handler is not None:
+        return
+    _queue_size = settings.log_queue_size
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=_queue_size))
+    sampling = {k: float(v) for k, v in _parse_pairs(settings.log_sampling).items()}
+    _handler.addFilter(SamplingFilter(sampling))
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.log_level.upper())
+    app_logger.addHandler(_handler)
+    app_logger.propagate = False
+    for name, level in _parse_pairs(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _start_listener()
+    # The writer thread does not survive fork (gunicorn preload): start a
+    # fresh queue and thread in each worker.
+    os.register_at_fork(after_in_child=_start_listener)
+
+
+def start_logging():
+    """Restart the writer thread if stop_logging() ran (app restarted in-process)."""
+    if _handler is not None and _listener is None:
+        _start_listener()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread; called on shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """Tag each request with X-Request-ID (inbound or generated) for logs."""
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for k, v in scope["headers"]:
+            if k == self.header:
+                request_id = v.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self.header, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,24 +1,80 @@
-import os
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-from .db import init_db
-from .api import auth, onboarding, admin, messages, test_protected
+import logging
+import sys
+import time
 
-load_dotenv()
+# Taken before anything else main.py imports, so the profile covers them
+_boot_start, _boot_modules = time.perf_counter(), len(sys.modules)
 
+from .config import get_settings
+from .profiling import StartupProfiler
+
+settings = get_settings()
+profiler = StartupProfiler(enabled=settings.startup_profile)
+profiler.record_since("import settings", _boot_start, _boot_modules)
+
+with profiler.measure("import fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+# Every subsystem below is imported eagerly at boot
+with profiler.measure("import app subsystems"):
+    from . import archive, crud, maintenance, tasks
+    from .audit import audit_log
+    from .notifications import dispatcher
+    from .compression import CompressionMiddleware
+    from .concurrency import ConcurrencyLimitMiddleware, parse_limits
+    from .idempotency import IdempotencyMiddleware
+    from .db import AsyncSessionLocal, engine, verify_schema_version
+    from .logging_config import (
+        RequestIdMiddleware,
+        configure_logging,
+        start_logging,
+        stop_logging,
+    )
+    from .shared_state import get_shared_state
+    from .tracing import TracingMiddleware, instrument_engine, trace_buffer
+
+with profiler.measure("configure logging"):
+    configure_logging(settings)
+logger = logging.getLogger(__name__)
+
+# (module, mount prefix, tags). Routers that declare their own prefix
+# ("/admin", "/onboarding", "/protected") are mounted without another one.
+ROUTERS = (
+    ("app.api.auth", "/auth", ["Auth"]),
+    ("app.api.onboarding", "", ["Onboarding"]),
+    ("app.api.admin", "", ["Admin"]),
+    ("app.api.messages", "/messages", ["Messages"]),
+    ("app.api.test_protected", "", None),
+)
+
+_build_start, _build_modules = time.perf_counter(), len(sys.modules)
 app = FastAPI(title="Eranos Consulting API")
 
+# Innermost, so the measured latency is the handler's own
+if settings.concurrency_limit_enabled:
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        limits=parse_limits(settings.concurrency_limits),
+        min_limit=settings.concurrency_min_limit,
+        max_limit=settings.concurrency_max_limit,
+        max_queue=settings.concurrency_queue_size,
+        queue_timeout=settings.concurrency_queue_timeout,
+    )
+
+# Outside the limiter: duplicates wait or replay without holding a slot
+if settings.idempotency_enabled:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        paths=settings.idempotency_path_set,
+        ttl=settings.idempotency_ttl_seconds,
+        lock_ttl=settings.idempotency_lock_seconds,
+        wait_timeout=settings.idempotency_wait_seconds,
+    )
+
 # CORS setup
-cors_raw = os.getenv(
-    "CORS_ORIGINS",
-    "http://localhost:3000,http://127.0.0.1:3000,"
-    "http://www.eranoconsultinggh.local,"
-    "http://clients.eranoconsultinggh.local,"
-    "http://admin.eranoconsultinggh.local",
-)
-origins = [o.strip() for o in cors_raw.split(",") if o.strip()]
-print("Loaded CORS origins:", origins)
+origins = settings.cors_origin_list
+logger.info("Loaded CORS origins", extra={"origins": origins})
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,17 +84,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include all routers
-app.include_router(auth.router, prefix="/auth", tags=["Auth"])
-app.include_router(onboarding.router, prefix="/onboarding", tags=["Onboarding"])
-app.include_router(admin.router, prefix="/admin", tags=["Admin"])
-app.include_router(messages.router, prefix="/messages", tags=["Messages"])
-app.include_router(test_protected.router)  # Already has prefix="/protected" in router
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+        cache_max_bytes=settings.compression_cache_max_bytes,
+    )
+
+if settings.trace_sample_rate > 0:
+    app.add_middleware(TracingMiddleware, sample_rate=settings.trace_sample_rate)
+    instrument_engine(engine)
+
+# Outermost, so every log line below it carries the request id
+app.add_middleware(RequestIdMiddleware)
+profiler.record_since("build app and middleware", _build_start, _build_modules)
+
+# Include all routers. The imports stay eager on purpose: FastAPI builds its
+# route table and OpenAPI schema from routers registered up front, and with
+# gunicorn's preload_app they run once in the master, not in every worker.
+# Deferring them would only move the same cost into the first request.
+for module_name, prefix, tags in ROUTERS:
+    module = profiler.import_module(module_name)
+    app.include_router(module.router, prefix=prefix, tags=tags)
 
 
 @app.on_event("startup")
 async def startup():
-    await init_db()
+    start_logging()
+    trace_buffer.configure(settings.trace_buffer_size, settings.trace_export_path)
+    if settings.verify_schema:
+        with profiler.measure("startup: verify schema version"):
+            await verify_schema_version()
+    await get_shared_state().start()
+    await audit_log.start()
+    if settings.stats_reconcile_interval_seconds:
+        tasks.start_periodic(
+            "stats-reconcile",
+            settings.stats_reconcile_interval_seconds,
+            reconcile_stats,
+            # Fills the rollups right after an upgrade instead of an hour later
+            run_immediately=True,
+        )
+    if settings.archive_interval_seconds:
+        tasks.start_periodic(
+            "message-archival",
+            settings.archive_interval_seconds,
+            archive.scheduled_archival,
+        )
+    if settings.smtp_host:
+        tasks.start_periodic(
+            "outbox-dispatch", settings.outbox_poll_interval, dispatcher.dispatch_once
+        )
+    if settings.maintenance_interval_seconds:
+        tasks.start_periodic(
+            "db-maintenance",
+            settings.maintenance_interval_seconds,
+            maintenance.scheduled_maintenance,
+        )
+    if profiler.enabled:
+        logger.info(profiler.report())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await tasks.stop_all()
+    await audit_log.stop()
+    dispatcher.close()
+    await get_shared_state().close()
+    trace_buffer.stop()
+    stop_logging()
+
+
+async def reconcile_stats():
+    async with AsyncSessionLocal() as db:
+        await crud.reconcile_stats(db)
 
 
 @app.get("/")
@@ -0,0 +1,299 @@
+# backend/app/maintenance.py
+"""Online maintenance and backups for the SQLite database.
+
+All work goes through a separate blocking sqlite3 connection with a busy
+timeout. The app keeps serving while it runs. Backups use SQLite's backup
+API a few pages at a time and sleep between steps, so writers are not
+held up for the whole copy. A write to the database restarts that copy;
+after BACKUP_MAX_RESTARTS restarts the backup falls back to a single
+``VACUUM INTO`` snapshot so it always finishes.
+
+Usage (from backend/):
+  python -m app.maintenance report
+  python -m app.maintenance check [--full]
+  python -m app.maintenance optimize [--vacuum-pages 1000]
+  python -m app.maintenance backup [--dest backups/erano.db]
+  python -m app.maintenance enable-incremental-vacuum   # one-off, full VACUUM
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def sqlite_path(url: str | None = None) -> Path:
+    """Database file behind DATABASE_URL; only file-backed SQLite qualifies."""
+    u = make_url(url or get_settings().database_url)
+    if u.get_backend_name() != "sqlite" or u.database in (None, "", ":memory:"):
+        raise RuntimeError("Database maintenance requires a file-backed SQLite DB")
+    return Path(u.database)
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or sqlite_path(), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def integrity_check(conn: sqlite3.Connection, full: bool = False) -> list[str]:
+    """["ok"] when healthy. quick_check skips index/content cross-checks."""
+    pragma = "integrity_check" if full else "quick_check"
+    return [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+
+
+def optimize(conn: sqlite3.Connection) -> dict:
+    """Refresh stale query planner statistics, reading a bounded sample.
+
+    analysis_limit caps the rows ANALYZE reads per index, so this stays
+    cheap on a live database. PRAGMA optimize only re-analyzes tables whose
+    statistics are missing or out of date. Before SQLite 3.46 it only looks
+    at tables this connection has queried (none, on a fresh maintenance
+    connection), so there the sampled ANALYZE is run directly.
+    """
+    start = time.perf_counter()
+    conn.execute(f"PRAGMA analysis_limit={int(get_settings().sqlite_analysis_limit)}")
+    if sqlite3.sqlite_version_info >= (3, 46, 0):
+        conn.execute("PRAGMA optimize=0x10002")  # 0x10000: check every table
+    else:
+        conn.execute("ANALYZE")
+    return {"analyze_seconds": round(time.perf_counter() - start, 3)}
+
+
+def incremental_vacuum(conn: sqlite3.Connection, max_pages: int) -> dict:
+    """Release up to `max_pages` free pages (auto_vacuum=INCREMENTAL only).
+
+    SQLite reads incremental_vacuum(0) as "free every page", so 0 is
+    rejected rather than passed through.
+    """
+    if max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+    mode = AUTO_VACUUM_MODES[conn.execute("PRAGMA auto_vacuum").fetchone()[0]]
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if mode != "incremental":
+        return {"auto_vacuum": mode, "freelist_pages": before, "freed_pages": 0}
+    # executescript steps the pragma to completion; execute() frees one page
+    conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"auto_vacuum": mode, "freelist_pages": after, "freed_pages": before - after}
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection):
+    """Switch to auto_vacuum=INCREMENTAL. Rewrites the file: run off-hours."""
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def run_maintenance(vacuum_pages: int | None = None, full_check: bool = False):
+    """Integrity check, statistics refresh and incremental vacuum in one go."""
+    if vacuum_pages is None:
+        vacuum_pages = get_settings().incremental_vacuum_pages
+    conn = connect()
+    try:
+        problems = [m for m in integrity_check(conn, full_check) if m != "ok"]
+        result = {
+            "integrity": "ok" if not problems else problems,
+            **optimize(conn),
+            **incremental_vacuum(conn, vacuum_pages),
+        }
+    finally:
+        conn.close()
+    if problems:
+        logger.error("SQLite integrity check failed", extra={"problems": problems})
+    return result
+
+
+async def scheduled_maintenance():
+    """Periodic job; the blocking work runs in a thread."""
+    await asyncio.to_thread(run_maintenance)
+
+
+def backup(dest: Path | None = None, pages_per_step: int | None = None) -> dict:
+    """Online copy via the backup API, verified with quick_check.
+
+    Writes to `<dest>.partial` and renames on success, so `dest` is never a
+    half-written file. Falls back to VACUUM INTO when writes keep
+    restarting the paged copy.
+    """
+    settings = get_settings()
+    src_path = sqlite_path()
+    if dest is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        dest = Path(settings.backup_dir) / f"{src_path.stem}-{stamp}.db"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial = dest.with_name(dest.name + ".partial")
+    partial.unlink(missing_ok=True)
+
+    start = time.perf_counter()
+    steps = restarts = 0
+    last_remaining = None
+    method = "backup"
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining > last_remaining:
+            # Another connection wrote to the source; the copy started over
+            restarts += 1
+            if restarts > settings.backup_max_restarts:
+                raise _TooManyRestarts
+        last_remaining = remaining
+
+    src, dst = connect(src_path), sqlite3.connect(partial)
+    try:
+        try:
+            # Each step copies `pages` pages and then releases the read lock
+            src.backup(
+                dst,
+                pages=pages_per_step or settings.backup_pages_per_step,
+                progress=progress,
+                sleep=settings.backup_step_sleep,
+            )
+        except _TooManyRestarts:
+            dst.close()
+            partial.unlink(missing_ok=True)
+            # One read transaction: a consistent snapshot however busy the DB
+            src.execute("VACUUM INTO ?", (str(partial),))
+            dst = sqlite3.connect(partial)
+            method = "vacuum_into"
+        check = integrity_check(dst)
+    finally:
+        src.close()
+        dst.close()
+    if check != ["ok"]:
+        partial.unlink(missing_ok=True)
+        raise RuntimeError(f"Backup failed verification: {check[:5]}")
+    partial.replace(dest)
+    result = {
+        "path": str(dest),
+        "bytes": dest.stat().st_size,
+        "method": method,
+        "steps": steps,
+        "restarts": restarts,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info("SQLite backup written", extra=result)
+    return result
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def report(conn: sqlite3.Connection | None = None) -> dict:
+    """File size, page usage and per-table/index storage and statistics."""
+    own = conn is None
+    conn = conn or connect()
+    try:
+        pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+        page_size, page_count = pragma("page_size"), pragma("page_count")
+        freelist = pragma("freelist_count")
+        objects = {
+            row["name"]: {"type": row["type"], "table": row["tbl_name"]}
+            for row in conn.execute(
+                "SELECT type, name, tbl_name FROM sqlite_master "
+                "WHERE type IN ('table', 'index')"
+            )
+        }
+        try:
+            # dbstat is compiled into most SQLite builds, but not all
+            for row in conn.execute(
+                "SELECT name, COUNT(*) AS pages, SUM(pgsize) AS bytes, "
+                "SUM(unused) AS unused FROM dbstat GROUP BY name"
+            ):
+                if row["name"] in objects:
+                    objects[row["name"]].update(
+                        pages=row["pages"], bytes=row["bytes"], unused=row["unused"]
+                    )
+        except sqlite3.OperationalError:
+            pass
+        try:
+            # Written by ANALYZE: "<rows> <avg rows per distinct key prefix>..."
+            for row in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"):
+                name = row["idx"] or row["tbl"]
+                if name in objects:
+                    objects[name]["stat"] = row["stat"]
+        except sqlite3.OperationalError:  # ANALYZE has never run
+            pass
+        tables = {
+            name: {**info, "rows": _row_count(conn, name)}
+            for name, info in objects.items()
+            if info["type"] == "table"
+        }
+        indexes = {n: i for n, i in objects.items() if i["type"] == "index"}
+        return {
+            "path": str(sqlite_path()),
+            "file_bytes": page_size * page_count,
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_pages": freelist,
+            "free_ratio": round(freelist / page_count, 4) if page_count else 0.0,
+            "auto_vacuum": AUTO_VACUUM_MODES[pragma("auto_vacuum")],
+            "journal_mode": pragma("journal_mode"),
+            "tables": tables,
+            "indexes": indexes,
+        }
+    finally:
+        if own:
+            conn.close()
+
+
+def _row_count(conn: sqlite3.Connection, table: str) -> int:
+    return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report")
+    check = sub.add_parser("check")
+    check.add_argument("--full", action="store_true")
+    opt = sub.add_parser("optimize")
+    opt.add_argument(
+        "--vacuum-pages",
+        type=_positive_int,
+        default=None,
+        help="free pages to release (at least 1; default INCREMENTAL_VACUUM_PAGES)",
+    )
+    opt.add_argument("--full-check", action="store_true")
+    bak = sub.add_parser("backup")
+    bak.add_argument("--dest", type=Path, default=None)
+    bak.add_argument("--pages-per-step", type=int, default=None)
+    sub.add_parser("enable-incremental-vacuum")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        out = report()
+    elif args.command == "check":
+        conn = connect()
+        out = {"integrity": integrity_check(conn, args.full)}
+        conn.close()
+    elif args.command == "optimize":
+        out = run_maintenance(args.vacuum_pages, args.full_check)
+    elif args.command == "backup":
+        out = backup(args.dest, args.pages_per_step)
+    else:
+        conn = connect()
+        enable_incremental_vacuum(conn)
+        conn.close()
+        out = {"auto_vacuum": "incremental"}
+    print(json.dumps(out, indent=2, default=str))
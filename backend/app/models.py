@@ -1,5 +1,15 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Text,
+    Index,
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, declarative_base
 
@@ -26,6 +36,8 @@ class User(Base):
 
 class Client(Base):
     __tablename__ = "clients"
+    # Broadcasts by status read user ids straight from this index, in order
+    __table_args__ = (Index("ix_clients_status", "status", "user_id"),)
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
     company_name = Column(String(256))
@@ -35,7 +47,7 @@ class Client(Base):
     status = Column(String(50), default="pending")  # pending | active | rejected
     kyc_uploaded = Column(Boolean, default=False)
     payment_verified = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     user = relationship("User", back_populates="client")
 
@@ -46,7 +58,7 @@ class FileRecord(Base):
     filename = Column(String(512), nullable=False)
     path = Column(Text, nullable=False)
     file_type = Column(String(100))  # 'kyc' | 'receipt' | 'other'
-    uploader_id = Column(Integer, ForeignKey("users.id"))
+    uploader_id = Column(Integer, ForeignKey("users.id"), index=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     uploader = relationship("User", back_populates="files")
@@ -66,12 +78,90 @@ class RefreshToken(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_sender_id", "sender_id", "id"),
+        Index("ix_messages_receiver_id", "receiver_id", "id"),
+        Index("ix_messages_conversation", "sender_id", "receiver_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
+
+
+# --- Dashboard rollups (maintained incrementally by crud write paths) ---
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    name = Column(String(100), primary_key=True)  # e.g. "clients.status.active"
+    value = Column(Integer, nullable=False, default=0)
+
+
+class DailyStat(Base):
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(50), primary_key=True)  # signups | uploads | messages
+    count = Column(Integer, nullable=False, default=0)
+
+
+# --- Message archival (see app/archive.py) ---
+class MessageArchivePartition(Base):
+    """One row per monthly messages_archive_YYYYMM table."""
+
+    __tablename__ = "message_archive_partitions"
+
+    month = Column(String(7), primary_key=True)  # "YYYY-MM"
+    table_name = Column(String(64), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    min_id = Column(Integer)
+    max_id = Column(Integer)
+    max_timestamp = Column(DateTime)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --- Audit trail (written behind by app/audit.py) ---
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    event = Column(String(64), nullable=False, index=True)  # e.g. "auth.login"
+    outcome = Column(String(16), nullable=False)  # success | failure
+    actor_id = Column(Integer, index=True)  # users.id, when known
+    target = Column(String(256))  # e.g. email, client id, filename
+    ip = Column(String(64))
+    request_id = Column(String(64))
+    details = Column(Text)  # JSON
+
+
+# --- Notification outbox (written with the change, sent by app/notifications.py) ---
+class OutboxEvent(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_status_due", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)  # client_status | message
+    payload = Column(Text)  # JSON
+    status = Column(
+        String(16), nullable=False, default="pending"
+    )  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    claimed_by = Column(String(64))
+    claimed_at = Column(DateTime(timezone=True))
+    sent_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
@@ -0,0 +1,264 @@
+# backend/app/notifications.py
+"""Email notifications through a transactional outbox.
+
+Write paths call ``crud.add_notification(db, ...)`` before their commit.
+The outbox row commits or rolls back together with the change it
+describes. The request never talks to SMTP.
+
+The dispatcher is a periodic task in every worker. Each run does this:
+  1. claims a batch of due rows (pending, or "sending" with a stale claim)
+     by stamping them with a token unique to that claim
+  2. groups them by recipient into one digest email each
+  3. sends the digests over a small pool of persistent SMTP connections
+  4. marks rows sent, or reschedules them with exponential backoff until
+     OUTBOX_MAX_ATTEMPTS is reached
+
+For local testing:  python -m aiosmtpd -n -l localhost:8025
+(with SMTP_HOST=localhost, SMTP_PORT=8025).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import smtplib
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Optional
+
+from sqlalchemy import or_, select, update
+
+from app import models
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """Reusable blocking SMTP connections; used from worker threads."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+
+    def _connect(self) -> smtplib.SMTP:
+        s = self.settings
+        conn = smtplib.SMTP(s.smtp_host, s.smtp_port, timeout=s.smtp_timeout)
+        if s.smtp_starttls:
+            conn.starttls()
+        if s.smtp_username:
+            conn.login(s.smtp_username, s.smtp_password)
+        return conn
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            self._discard(conn)
+
+    def _discard(self, conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def send(self, message: EmailMessage):
+        conn = self._checkout()
+        try:
+            conn.send_message(message)
+        except Exception:
+            self._discard(conn)
+            raise
+        if self._idle.qsize() < self.settings.smtp_pool_size:
+            self._idle.put(conn)
+        else:
+            self._discard(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._discard(self._idle.get_nowait())
+
+
+def render_digest(email: str, events: list[models.OutboxEvent]) -> EmailMessage:
+    """One email summarising every pending event for a recipient."""
+    lines = []
+    messages = [e for e in events if e.kind == "message"]
+    for event in events:
+        payload = json.loads(event.payload or "{}")
+        if event.kind == "client_status":
+            lines.append(f"Your onboarding status is now: {payload.get('status')}.")
+    if messages:
+        lines.append(
+            f"You have {len(messages)} new message{'s' if len(messages) > 1 else ''} "
+            "in the client portal."
+        )
+    msg = EmailMessage()
+    msg["From"] = get_settings().smtp_from
+    msg["To"] = email
+    msg["Subject"] = (
+        "Erano Consulting: account update"
+        if len(lines) == 1
+        else f"Erano Consulting: {len(events)} updates"
+    )
+    msg.set_content("Hello,\n\n" + "\n".join(lines) + "\n\nErano Consulting\n")
+    return msg
+
+
+class Dispatcher:
+    def __init__(self):
+        self._pool: Optional[SMTPPool] = None
+        self.sent = 0
+        self.digests = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def pool(self) -> SMTPPool:
+        if self._pool is None:
+            self._pool = SMTPPool(get_settings())
+        return self._pool
+
+    async def claim(self, db) -> list[models.OutboxEvent]:
+        settings = get_settings()
+        O = models.OutboxEvent
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=settings.outbox_claim_timeout)
+        due = or_(
+            (O.status == "pending") & (O.next_attempt_at <= now),
+            (O.status == "sending") & (O.claimed_at < stale),  # worker died
+        )
+        ids = (
+            (
+                await db.execute(
+                    select(O.id)
+                    .where(due)
+                    .order_by(O.id)
+                    .limit(settings.outbox_batch_size)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return []
+        # A fresh token per claim: a worker id computed at import would be
+        # shared by every worker forked from a preloaded app
+        token = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        # Conditional update: if another worker claimed a row first, it no
+        # longer matches `due` and is skipped here
+        await db.execute(
+            update(O)
+            .where(O.id.in_(ids), due)
+            .values(status="sending", claimed_by=token, claimed_at=now)
+        )
+        await db.commit()
+        return (
+            (
+                await db.execute(
+                    select(O).where(
+                        O.id.in_(ids), O.status == "sending", O.claimed_by == token
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    async def dispatch_once(self) -> int:
+        """Claim, coalesce, send; returns the number of events delivered."""
+        settings = get_settings()
+        async with AsyncSessionLocal() as db:
+            events = await self.claim(db)
+            if not events:
+                return 0
+            by_recipient = defaultdict(list)
+            for event in events:
+                by_recipient[event.recipient_id].append(event)
+            emails = dict(
+                (
+                    await db.execute(
+                        select(models.User.id, models.User.email).where(
+                            models.User.id.in_(by_recipient)
+                        )
+                    )
+                ).all()
+            )
+
+            async def deliver(recipient_id, batch):
+                email = emails.get(recipient_id)
+                if not email:
+                    return batch, "recipient not found"
+                try:
+                    await asyncio.to_thread(self.pool.send, render_digest(email, batch))
+                    return batch, None
+                except Exception as e:
+                    return batch, f"{type(e).__name__}: {e}"
+
+            # At most smtp_pool_size sends in flight; each uses its own connection
+            sem = asyncio.Semaphore(settings.smtp_pool_size)
+
+            async def bounded(recipient_id, batch):
+                async with sem:
+                    return await deliver(recipient_id, batch)
+
+            results = await asyncio.gather(
+                *(bounded(r, b) for r, b in by_recipient.items())
+            )
+            now = datetime.now(timezone.utc)
+            delivered = 0
+            for batch, error in results:
+                for event in batch:
+                    event.attempts += 1
+                    event.claimed_by = event.claimed_at = None
+                    if error is None:
+                        event.status, event.sent_at = "sent", now
+                    elif event.attempts >= settings.outbox_max_attempts:
+                        event.status, event.last_error = "failed", error
+                        self.failed += 1
+                    else:
+                        delay = min(
+                            settings.outbox_retry_base_seconds
+                            * 2 ** (event.attempts - 1),
+                            settings.outbox_retry_max_seconds,
+                        )
+                        event.status, event.last_error = "pending", error
+                        event.next_attempt_at = now + timedelta(seconds=delay)
+                        self.retried += 1
+                if error is None:
+                    delivered += len(batch)
+                    self.digests += 1
+                else:
+                    logger.warning(
+                        "Notification delivery failed",
+                        extra={"events": len(batch), "error": error},
+                    )
+            await db.commit()
+            self.sent += delivered
+            return delivered
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def snapshot(self) -> dict:
+        return {
+            "sent_events": self.sent,
+            "digests": self.digests,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+dispatcher = Dispatcher()
@@ -0,0 +1,154 @@
+# backend/app/passwords.py
+"""bcrypt cost policy: calibration, capacity estimate and rehash-on-login.
+
+BCRYPT_ROUNDS is the cost of new hashes. Each extra round doubles the CPU
+time of a hash and of every login that verifies it. After a successful
+login, a stored hash made with a different cost is rewritten in a
+background task, so the login response never pays for the second hash.
+
+Usage (from backend/):
+  python -m app.passwords calibrate --target-ms 250 --logins-per-sec 20
+  python -m app.passwords budget --logins-per-sec 50 [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Optional
+
+from passlib.hash import bcrypt
+from sqlalchemy import update
+
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+MIN_ROUNDS = 10  # never calibrate below this, however slow the host
+MAX_ROUNDS = 16
+
+_SAMPLE_PASSWORD = "calibration-Passw0rd!"
+
+
+def measure(rounds: int, samples: int = 5) -> float:
+    """Median seconds for one bcrypt hash (a verify costs the same)."""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash(_SAMPLE_PASSWORD)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int = 5, min_rounds: int = MIN_ROUNDS) -> dict:
+    """Highest rounds whose median hash time stays within `target_ms`."""
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, MAX_ROUNDS + 1):
+        timings[rounds] = measure(rounds, samples)
+        if timings[rounds] * 1000 > target_ms:
+            break
+        chosen = rounds
+    return {
+        "target_ms": target_ms,
+        "rounds": chosen,
+        "hash_ms": round(timings[chosen] * 1000, 1),
+        "within_target": timings[chosen] * 1000 <= target_ms,
+        "measured_ms": {r: round(t * 1000, 1) for r, t in timings.items()},
+    }
+
+
+def cpu_budget(
+    logins_per_sec: float, seconds_per_hash: float, cores: Optional[int] = None
+) -> dict:
+    """CPU needed to verify `logins_per_sec` logins at the given hash cost."""
+    cores = cores or os.cpu_count() or 1
+    cpu_seconds = logins_per_sec * seconds_per_hash  # per wall-clock second
+    return {
+        "logins_per_sec": logins_per_sec,
+        "hash_ms": round(seconds_per_hash * 1000, 1),
+        "cores_needed": round(cpu_seconds, 2),
+        "cores_available": cores,
+        "utilisation": round(cpu_seconds / cores, 3),
+        "max_logins_per_sec": round(cores / seconds_per_hash, 1),
+    }
+
+
+# --- Rehash on login ---
+_pending: dict[int, asyncio.Task] = {}
+_stats = {"rehashed": 0, "rehash_skipped": 0, "rehash_failed": 0}
+
+
+def schedule_rehash(user_id: int, password: str, old_hash: str):
+    """Rewrite `old_hash` at the current cost once the login has returned."""
+    if not get_settings().bcrypt_rehash_on_login or user_id in _pending:
+        return
+    if len(_pending) >= get_settings().bcrypt_max_pending_rehashes:
+        # After a policy change, don't double the CPU cost of a login burst;
+        # the rest are picked up on a later login
+        _stats["rehash_skipped"] += 1
+        return
+    task = asyncio.create_task(_rehash(user_id, password, old_hash))
+    _pending[user_id] = task
+    task.add_done_callback(lambda _: _pending.pop(user_id, None))
+
+
+async def _rehash(user_id: int, password: str, old_hash: str):
+    from app.utils import hash_password
+
+    try:
+        new_hash = await asyncio.to_thread(hash_password, password)
+        async with AsyncSessionLocal() as db:
+            # Only if the password was not changed in the meantime
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+        if result.rowcount:
+            _stats["rehashed"] += 1
+    except Exception:
+        _stats["rehash_failed"] += 1
+        logger.exception("Password rehash failed", extra={"user_id": user_id})
+
+
+def snapshot() -> dict:
+    return {
+        "bcrypt_rounds": get_settings().bcrypt_rounds,
+        "rehash_pending": len(_pending),
+        **_stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bcrypt cost calibration")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate")
+    cal.add_argument("--target-ms", type=float, default=250.0)
+    cal.add_argument("--logins-per-sec", type=float, default=None)
+    cal.add_argument("--samples", type=int, default=5)
+    bud = sub.add_parser("budget")
+    bud.add_argument("--logins-per-sec", type=float, required=True)
+    bud.add_argument("--rounds", type=int, default=None)
+    bud.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        out = calibrate(args.target_ms, args.samples)
+        out["env"] = f"BCRYPT_ROUNDS={out['rounds']}"
+        if args.logins_per_sec:
+            out["budget"] = cpu_budget(args.logins_per_sec, out["hash_ms"] / 1000)
+    else:
+        rounds = args.rounds or get_settings().bcrypt_rounds
+        out = {
+            "rounds": rounds,
+            **cpu_budget(args.logins_per_sec, measure(rounds, args.samples)),
+        }
+    print(json.dumps(out, indent=2))
@@ -0,0 +1,45 @@
+# backend/app/profiling.py
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Collects wall-clock timings for boot phases when STARTUP_PROFILE is set."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.timings: list[tuple[str, float, int]] = []
+
+    @contextmanager
+    def measure(self, label: str):
+        if not self.enabled:
+            yield
+            return
+        start, loaded_before = time.perf_counter(), len(sys.modules)
+        try:
+            yield
+        finally:
+            self.record_since(label, start, loaded_before)
+
+    def record_since(self, label: str, start: float, loaded_before: int):
+        """Record a phase that began (perf_counter, len(sys.modules)) earlier."""
+        if self.enabled:
+            elapsed = time.perf_counter() - start
+            self.timings.append((label, elapsed, len(sys.modules) - loaded_before))
+
+    def import_module(self, name: str):
+        """Import `name`, timing it (and everything it pulls in) when enabled."""
+        with self.measure(f"import {name}"):
+            return importlib.import_module(name)
+
+    def report(self) -> str:
+        total = sum(elapsed for _, elapsed, _ in self.timings)
+        lines = ["Startup profile:"]
+        for label, elapsed, new_modules in self.timings:
+            lines.append(
+                f"  {elapsed * 1000:9.1f} ms  {label}  (+{new_modules} modules)"
+            )
+        lines.append(f"  {total * 1000:9.1f} ms  total")
+        return "\n".join(lines)
@@ -1,7 +1,7 @@
 # backend/app/schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, root_validator
+from typing import List, Optional
+from datetime import date, datetime
 from pydantic import BaseModel
 
 
@@ -85,3 +85,87 @@ class MessageOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+# Broadcasts
+class BroadcastCreate(BaseModel):
+    content: str
+    receiver_ids: Optional[List[int]] = None
+    client_status: Optional[str] = None  # e.g. "active"
+
+    @root_validator(skip_on_failure=True)
+    def one_audience(cls, values):
+        if (values.get("receiver_ids") is None) == (
+            values.get("client_status") is None
+        ):
+            raise ValueError("Provide exactly one of receiver_ids or client_status")
+        return values
+
+
+class BroadcastJobOut(BaseModel):
+    id: str
+    status: str  # queued | running | completed | failed
+    total: int
+    sent: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Admin dashboard
+class DailyStatsOut(BaseModel):
+    day: date
+    signups: int = 0
+    uploads: int = 0
+    messages: int = 0
+
+
+class AdminStats(BaseModel):
+    total_clients: int
+    clients_by_status: dict[str, int]
+    kyc_completion_rate: float
+    payment_completion_rate: float
+    daily: List[DailyStatsOut]
+
+
+# Audit trail
+class AuditEventOut(BaseModel):
+    id: int
+    created_at: datetime
+    event: str
+    outcome: str
+    actor_id: Optional[int]
+    target: Optional[str]
+    ip: Optional[str]
+    request_id: Optional[str]
+    details: Optional[str]  # JSON
+
+    class Config:
+        orm_mode = True
+
+
+# Onboarding status (client portal)
+class FileOut(BaseModel):
+    id: int
+    filename: str
+    file_type: Optional[str]
+    uploaded_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class OnboardingChecklist(BaseModel):
+    kyc_uploaded: bool
+    payment_verified: bool
+    approval_status: str  # pending | active | rejected
+
+
+class OnboardingStatus(BaseModel):
+    user: UserOut
+    client: Optional[ClientOut]
+    files: List[FileOut]
+    checklist: OnboardingChecklist
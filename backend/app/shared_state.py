@@ -0,0 +1,209 @@
+# backend/app/shared_state.py
+"""Key/value state that can be shared by all worker processes.
+
+``memory``  per-process dicts; fine for a single uvicorn worker.
+``sqlite``  a local SQLite file (WAL) that every worker on the host opens;
+            stands in for Redis for caches, counters, locks and job progress.
+
+Cache invalidation needs no messaging: cached read models live in this
+store, so a ``delete`` from one worker is seen by all of them.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState(ABC):
+    """Interface shared by the backends. Values must be JSON-serializable."""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Any: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to an integer; `ttl` applies when the key is created."""
+
+
+class MemoryState(SharedState):
+    # Expired keys are dropped when read; this sweep catches the ones never read
+    SWEEP_EVERY_WRITES = 1000
+
+    def __init__(self):
+        self._data: dict[str, tuple[Any, Optional[float]]] = {}
+        self._writes = 0
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    async def get(self, key):
+        item = self._live(key)
+        return item[0] if item else None
+
+    async def set(self, key, value, ttl=None):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY_WRITES == 0:
+            now = time.monotonic()
+            for k in [k for k, (_, exp) in self._data.items() if exp and exp <= now]:
+                del self._data[k]
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def incr(self, key, amount=1, ttl=None):
+        item = self._live(key)
+        if item:
+            value, expires = item[0] + amount, item[1]
+        else:
+            value, expires = amount, time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires)
+        return value
+
+
+class SQLiteState(SharedState):
+    # Expired rows are dropped by this sweep (and ignored when read)
+    SWEEP_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            # Left by versions that had pub/sub
+            conn.execute("DROP TABLE IF EXISTS events")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn, *args):
+        # One statement at a time per process; sqlite3 handles cross-process locking
+        async with self._lock:
+            return await asyncio.to_thread(fn, self._connect(), *args)
+
+    async def start(self):
+        self._sweeper = asyncio.create_task(self._sweep(), name="shared-state-sweep")
+
+    async def close(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def get(self, key):
+        def op(conn):
+            return conn.execute(
+                "SELECT value FROM kv WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+
+        row = await self._run(op)
+        return json.loads(row[0]) if row else None
+
+    async def set(self, key, value, ttl=None):
+        def op(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl if ttl else None),
+            )
+
+        await self._run(op)
+
+    async def delete(self, key):
+        await self._run(
+            lambda conn: conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        )
+
+    async def incr(self, key, amount=1, ttl=None):
+        def op(conn):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now)
+                )
+                conn.execute(
+                    "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + ?",
+                    (key, str(amount), now + ttl if ttl else None, amount),
+                )
+                value = conn.execute(
+                    "SELECT value FROM kv WHERE key = ?", (key,)
+                ).fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return int(value)
+
+        return await self._run(op)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.SWEEP_INTERVAL_SECONDS)
+            try:
+                await self._run(
+                    lambda conn: conn.execute(
+                        "DELETE FROM kv WHERE expires_at <= ?", (time.time(),)
+                    )
+                )
+            except Exception:
+                logger.exception("Shared state sweep failed")
+
+
+_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> SharedState:
+    """Process-wide backend selected by SHARED_STATE_BACKEND."""
+    global _state
+    if _state is None:
+        settings = get_settings()
+        if settings.shared_state_backend == "sqlite":
+            _state = SQLiteState(settings.shared_state_path)
+        elif settings.shared_state_backend == "memory":
+            _state = MemoryState()
+        else:
+            raise ValueError(
+                f"Unknown SHARED_STATE_BACKEND {settings.shared_state_backend!r}"
+            )
+    return _state
@@ -0,0 +1,36 @@
+# backend/app/tasks.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Background loops started from the app's startup hook (one set per worker)
+_tasks: list[asyncio.Task] = []
+
+
+def start_periodic(name: str, interval: float, job, run_immediately: bool = False):
+    """Run `await job()` every `interval` seconds until shutdown.
+
+    With `run_immediately` the first run happens at startup instead of
+    after the first interval.
+    """
+
+    async def loop():
+        wait = not run_immediately
+        while True:
+            if wait:
+                await asyncio.sleep(interval)
+            wait = True
+            try:
+                await job()
+            except Exception:
+                logger.exception("Periodic task failed", extra={"task": name})
+
+    _tasks.append(asyncio.create_task(loop(), name=name))
+
+
+async def stop_all():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
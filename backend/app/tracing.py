@@ -0,0 +1,252 @@
+# backend/app/tracing.py
+"""Lightweight request tracing: nested spans kept in a ring buffer.
+
+The sampling decision is made once per request. Unsampled requests pay for
+a single ContextVar lookup per instrumented call site. Sampled traces are
+kept in memory (GET /admin/traces) and, when TRACE_EXPORT_PATH is set,
+appended as JSON lines by a background thread.
+
+    with span("crud.save_file", user_id=user.id):
+        ...
+
+An inbound W3C ``traceparent`` header continues the caller's trace and its
+sampled flag forces sampling; sampled responses carry ``X-Trace-ID``.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start: float  # epoch seconds
+    duration_ms: Optional[float] = None
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_t0")
+        return data
+
+
+class Trace:
+    """Spans of one sampled request; handed to the exporter when the root ends."""
+
+    def __init__(self, trace_id: str, parent_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.parent_id = parent_id  # remote parent from traceparent
+        self.spans: list[Span] = []
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class TraceBuffer:
+    """Most recent sampled traces, plus the optional JSON-lines file exporter."""
+
+    def __init__(self, max_traces: int = 200):
+        self.traces: deque = deque(maxlen=max_traces)
+        self.sampled = 0
+        self._queue: Optional[queue.Queue] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self.dropped = 0
+
+    def configure(self, max_traces: int, export_path: Optional[str]):
+        self.traces = deque(self.traces, maxlen=max_traces)
+        if export_path and self._listener is None:
+            writer = logging.FileHandler(export_path)
+            writer.setFormatter(logging.Formatter("%(message)s"))
+            self._queue = queue.Queue(maxsize=10000)
+            self._listener = logging.handlers.QueueListener(self._queue, writer)
+            self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def add(self, trace: Trace):
+        record = {
+            "trace_id": trace.trace_id,
+            "spans": [s.to_dict() for s in trace.spans],
+        }
+        self.sampled += 1
+        self.traces.append(record)
+        if self._queue is not None:
+            line = logging.makeLogRecord({"msg": json.dumps(record, default=str)})
+            try:
+                self._queue.put_nowait(line)
+            except queue.Full:
+                self.dropped += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "sampled_traces": self.sampled,
+            "buffered_traces": len(self.traces),
+            "export_dropped": self.dropped,
+        }
+
+
+trace_buffer = TraceBuffer()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+class _ActiveSpan:
+    def __init__(self, trace: Trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        self.span = Span(
+            self.trace.trace_id,
+            _new_id(8),
+            parent.span_id if parent else self.trace.parent_id,
+            self.name,
+            time.time(),
+            attributes=self.attributes,
+        )
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        self.span.finish()
+        self.trace.spans.append(self.span)
+        return False
+
+
+_NOOP = nullcontext()
+
+
+def span(name: str, **attributes):
+    """Time a block as a child of the current span; no-op when unsampled."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return _ActiveSpan(trace, name, attributes)
+
+
+def _parse_traceparent(value: str):
+    """(trace_id, parent_id, sampled) from "00-<32 hex>-<16 hex>-<2 hex flags>"."""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class TracingMiddleware:
+    """Root span per HTTP request; sampled by rate or by inbound traceparent."""
+
+    def __init__(self, app, sample_rate: float = 0.01, buffer=trace_buffer):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.buffer = buffer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace_id = parent_id = None
+        sampled = random.random() < self.sample_rate
+        for k, v in scope["headers"]:
+            if k == b"traceparent":
+                parsed = _parse_traceparent(v.decode("latin-1"))
+                if parsed:
+                    trace_id, parent_id, sampled = parsed[0], parsed[1], parsed[2]
+                break
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(trace_id or _new_id(16), parent_id)
+        token = _current_trace.set(trace)
+        status = {}
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", trace.trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            with span(f"{scope['method']} {scope['path']}", kind="http") as root:
+                await self.app(scope, receive, send_with_trace)
+                root.attributes["status"] = status.get("code")
+        finally:
+            _current_trace.reset(token)
+            self.buffer.add(trace)
+
+
+# --- SQL statements (one span per cursor execute) ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_trace.get() is not None:
+        context._trace_span = span(
+            "sql", statement=statement[:200], executemany=executemany
+        )
+        context._trace_span.__enter__()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    cm = getattr(context, "_trace_span", None)
+    if cm is not None:
+        context._trace_span = None
+        cm.__exit__(None, None, None)
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    cm = getattr(context, "_trace_span", None) if context is not None else None
+    if cm is not None:
+        context._trace_span = None
+        err = exception_context.original_exception
+        cm.__exit__(type(err), err, err.__traceback__)
+
+
+def instrument_engine(engine):
+    """Add SQL spans to an (async) engine; idempotent."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
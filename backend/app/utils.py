@@ -1,25 +1,36 @@
 # backend/app/utils.py
-import os
+import logging
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app import schemas, crud
+from app.config import get_settings
 from app.db import AsyncSessionLocal
+from app.tracing import span
 from sqlalchemy.ext.asyncio import AsyncSession
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# ✅ Single source of truth for JWT settings
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change_me_in_production")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=4)
+def _crypt_context(rounds: int) -> CryptContext:
+    # min == max == default: hashes at any other cost report needs_update()
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def get_pwd_context() -> CryptContext:
+    """CryptContext for the current BCRYPT_ROUNDS; follows override_settings()."""
+    return _crypt_context(get_settings().bcrypt_rounds)
 
 
 def _truncate_for_bcrypt(pw: str) -> str:
@@ -31,39 +42,55 @@ def _truncate_for_bcrypt(pw: str) -> str:
 def hash_password(password: str) -> str:
     """Hash password safely (bcrypt has a 72-byte limit)"""
     safe_pw = _truncate_for_bcrypt(password)
-    return pwd_context.hash(safe_pw)
+    with span("auth.hash_password"):
+        return get_pwd_context().hash(safe_pw)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
     safe_pw = _truncate_for_bcrypt(plain_password)
-    return pwd_context.verify(safe_pw, hashed_password)
+    with span("auth.verify_password"):
+        return get_pwd_context().verify(safe_pw, hashed_password)
 
 
 def create_access_token(
     subject: str | int, email: str, role: str, expires_delta: Optional[timedelta] = None
 ):
     """Create JWT access token"""
+    settings = get_settings()
     to_encode = {"sub": str(subject), "email": email, "role": role}
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(
+            minutes=settings.access_token_expire_minutes
+        )
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(
+        to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm
+    )
     return encoded_jwt
 
 
 def get_refresh_expires_at():
     """Get refresh token expiration datetime"""
-    return datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    days = get_settings().refresh_token_expire_days
+    return datetime.now(timezone.utc) + timedelta(days=days)
+
+
+def decode_token_strict(token: str) -> dict:
+    """Decode JWT token, raising JWTError on failure"""
+    settings = get_settings()
+    with span("auth.jwt_decode"):
+        return jwt.decode(
+            token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
+        )
 
 
 def decode_token(token: str):
     """Decode JWT token"""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
+        return decode_token_strict(token)
     except JWTError:
         return None
 
@@ -90,15 +117,15 @@ async def get_current_user(
     )
 
     try:
-        # ✅ Use JWT_SECRET_KEY (same as token creation)
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        # ✅ Same secret/algorithm as token creation
+        payload = decode_token_strict(token)
         email: str = payload.get("email") or payload.get("sub")
 
         if email is None:
             raise credentials_exception
 
     except JWTError as e:
-        print(f"JWT Error: {e}")  # Debug log
+        logger.info("JWT error: %s", e, extra={"sample": "auth.invalid_token"})
         raise credentials_exception
 
     user = await crud.get_user_by_email(db, email=email)
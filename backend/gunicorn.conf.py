@@ -0,0 +1,50 @@
+# backend/gunicorn.conf.py
+"""Production worker manager: `gunicorn -c gunicorn.conf.py app.main:app`
+
+Worker count comes from WEB_CONCURRENCY (0 = one per CPU core), the address
+from BIND.
+
+The app is preloaded in the master, so HUP only re-forks workers from the
+code the master already imported; it does not pick up a deploy. To load new
+code without dropping connections, start a new master with USR2, then send
+QUIT to the old one (its pid moves to gunicorn.pid.oldbin) once the new
+workers are up. Otherwise restart the service.
+"""
+import multiprocessing
+
+from app.config import get_settings
+
+settings = get_settings()
+
+bind = settings.bind
+workers = settings.web_concurrency or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork with modules already loaded
+preload_app = True
+
+# Let in-flight requests (and broadcast chunks) finish on upgrade/shutdown
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+# Recycle workers periodically; jitter avoids restarting them all at once
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+def post_fork(server, worker):
+    # Connections must never be shared across a fork; drop any the master opened
+    from app.db import engine
+
+    engine.sync_engine.dispose(close=False)
+
+
+def on_starting(server):
+    if workers > 1 and settings.shared_state_backend == "memory":
+        server.log.warning(
+            "Running %d workers with SHARED_STATE_BACKEND=memory: caches, "
+            "rate limits and broadcast progress are per worker. "
+            "Set SHARED_STATE_BACKEND=sqlite to share them.",
+            workers,
+        )
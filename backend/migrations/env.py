@@ -10,10 +10,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
 
 # --- Import your Base model ---
 from app.models import Base
+from app.db import sync_database_url
 
 # --- Alembic Config ---
 config = context.config
 
+# --- Same DATABASE_URL as the app (settings / backend/.env) ---
+config.set_main_option("sqlalchemy.url", sync_database_url().replace("%", "%%"))
+
 # --- Logging setup ---
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -22,6 +26,15 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(obj, name, type_, reflected, compare_to):
+    """Leave the on-demand monthly archive tables (app/archive.py) alone."""
+    if type_ == "table":
+        return not name.startswith("messages_archive_")
+    if type_ == "index":
+        return not obj.table.name.startswith("messages_archive_")
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -30,6 +43,7 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -49,6 +63,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
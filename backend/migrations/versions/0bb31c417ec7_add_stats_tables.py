@@ -0,0 +1,43 @@
+"""add stats tables
+
+Revision ID: 0bb31c417ec7
+Revises: 5fbcca76a667
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0bb31c417ec7'
+down_revision: Union[str, Sequence[str], None] = '5fbcca76a667'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stat_counters",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_table(
+        "daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("metric", sa.String(length=50), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "metric"),
+    )
+    # Rollups start empty; the reconciliation job (crud.reconcile_stats)
+    # backfills them from existing rows on its first run.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_stats")
+    op.drop_table("stat_counters")
@@ -0,0 +1,44 @@
+"""add query indexes
+
+Revision ID: 3038db013eef
+Revises: 4728ed799a13
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3038db013eef'
+down_revision: Union[str, Sequence[str], None] = '4728ed799a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Inbox/outbox pages: one index per side, each ordered by id
+    op.create_index("ix_messages_sender_id", "messages", ["sender_id", "id"])
+    op.create_index("ix_messages_receiver_id", "messages", ["receiver_id", "id"])
+    # Conversation between two users, in time order
+    op.create_index(
+        "ix_messages_conversation",
+        "messages",
+        ["sender_id", "receiver_id", "timestamp"],
+    )
+    op.create_index("ix_clients_status", "clients", ["status", "user_id"])
+    op.create_index("ix_clients_created_at", "clients", ["created_at"])
+    op.create_index("ix_files_uploader_id", "files", ["uploader_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_files_uploader_id", table_name="files")
+    op.drop_index("ix_clients_created_at", table_name="clients")
+    op.drop_index("ix_clients_status", table_name="clients")
+    op.drop_index("ix_messages_conversation", table_name="messages")
+    op.drop_index("ix_messages_receiver_id", table_name="messages")
+    op.drop_index("ix_messages_sender_id", table_name="messages")
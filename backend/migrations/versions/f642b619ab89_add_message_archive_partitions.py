@@ -0,0 +1,48 @@
+"""add message archive partitions
+
+Revision ID: f642b619ab89
+Revises: 0bb31c417ec7
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f642b619ab89'
+down_revision: Union[str, Sequence[str], None] = '0bb31c417ec7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_archive_partitions",
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("table_name", sa.String(length=64), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("min_id", sa.Integer(), nullable=True),
+        sa.Column("max_id", sa.Integer(), nullable=True),
+        sa.Column("max_timestamp", sa.DateTime(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("month"),
+    )
+    # Archival selects the oldest messages by timestamp
+    op.create_index("ix_messages_timestamp", "messages", ["timestamp"])
+    # The monthly messages_archive_YYYYMM tables are created on demand by
+    # app/archive.py and are excluded from autogenerate in env.py.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_messages_timestamp", table_name="messages")
+    op.drop_table("message_archive_partitions")
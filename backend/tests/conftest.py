@@ -0,0 +1,24 @@
+# backend/tests/conftest.py
+"""Point the app at a throwaway database before any test imports app.*.
+
+Settings are read once, on first use, so this has to happen at collection
+time rather than in a fixture.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+WORKDIR = Path(tempfile.mkdtemp(prefix="erano-tests-"))
+DB_PATH = WORKDIR / "test.db"
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["SMTP_HOST"] = "localhost"  # so the outbox inserts are issued too
+os.environ["BCRYPT_REHASH_ON_LOGIN"] = "false"
+os.environ["AUDIT_SPOOL_PATH"] = str(WORKDIR / "audit_spool.jsonl")
+os.environ["UPLOAD_DIR"] = str(WORKDIR / "uploads")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORKDIR, ignore_errors=True)
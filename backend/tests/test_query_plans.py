@@ -0,0 +1,407 @@
+# backend/tests/test_query_plans.py
+"""Query-plan regression tests for app/crud.py.
+
+Builds a SQLite database from the Alembic migrations and seeds it with
+representative volumes. It archives the oldest messages and runs ANALYZE.
+Each case then calls one crud function and runs EXPLAIN QUERY PLAN on
+every statement the function issued. A case fails when a statement scans
+a whole table, sorts through a temp B-tree or builds an automatic index,
+unless ALLOWED lists that case with a reason. Every crud coroutine must
+have a case, so new queries cannot skip the check.
+
+Run from backend/:  python -m pytest tests/test_query_plans.py
+Larger volumes:     QUERY_PLAN_MESSAGES=500000 python -m pytest tests/test_query_plans.py
+"""
+
+import asyncio
+import inspect
+import os
+import random
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from passlib.hash import bcrypt
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app import archive, crud, schemas
+from app.config import get_settings
+from app.db import AsyncSessionLocal, engine
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = Path(make_url(get_settings().database_url).database)
+
+USERS = int(os.getenv("QUERY_PLAN_USERS", "5000"))
+MESSAGES = int(os.getenv("QUERY_PLAN_MESSAGES", "100000"))
+AUDIT_EVENTS = int(os.getenv("QUERY_PLAN_AUDIT_EVENTS", "20000"))
+
+PASSWORD_HASH = bcrypt.using(rounds=4).hash("Passw0rd!")
+
+# Lookup tables that stay tiny; any plan that only touches these is fine
+SMALL_TABLES = {
+    "stat_counters": "one row per counter",
+    "message_archive_partitions": "one row per archived month",
+}
+
+# Plan lines that are expected, per case, and why
+ALLOWED = {
+    "reconcile_stats": {
+        "SCAN": "recomputes every rollup from the base tables (background job)",
+        "USE TEMP B-TREE FOR GROUP BY": "per-day grouping of the full tables",
+    },
+    "list_audit_events": {
+        "SCAN audit_events": "newest-first walk in rowid order, bounded by LIMIT",
+    },
+    "get_broadcast_recipient_ids[all]": {
+        "SCAN users": "a broadcast to everyone reads every active user",
+    },
+    "list_clients": {
+        "SCAN clients USING INDEX ix_clients_created_at": "index order, LIMIT",
+    },
+}
+
+
+def migrate():
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(cfg, "head")
+
+
+def seed(users: int, messages: int, audit_events: int):
+    """Representative volumes, with messages spread over the last two years."""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    ts = lambda days: (now - timedelta(days=days)).isoformat(sep=" ")
+    statuses = ["pending"] * 6 + ["active"] * 3 + ["rejected"]
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (id, email, hashed_password, role, is_active, "
+            "created_at) VALUES (?, ?, ?, ?, 1, ?)",
+            (
+                (i, f"user{i}@example.com", PASSWORD_HASH, "client", ts(i % 700))
+                for i in range(1, users + 1)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO clients (user_id, company_name, status, kyc_uploaded, "
+            "payment_verified, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    f"Company {i}",
+                    rng.choice(statuses),
+                    i % 2,
+                    i % 3 == 0,
+                    ts(i % 700),
+                )
+                for i in range(1, users)  # the last user has not onboarded yet
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO files (filename, path, file_type, uploader_id, uploaded_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"f{i}.pdf", f"uploads/f{i}.pdf", "kyc", i % users + 1, ts(i % 700))
+                for i in range(users * 2)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO refresh_tokens (token, user_id, expires_at, revoked) "
+            "VALUES (?, ?, ?, 0)",
+            ((f"token-{i}", i % users + 1, ts(-30)) for i in range(users * 2)),
+        )
+        # A few busy accounts (staff) exchange most messages, as in production
+        staff = list(range(1, 21))
+        conn.executemany(
+            "INSERT INTO messages (sender_id, receiver_id, content, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                (
+                    rng.choice(staff) if i % 2 else rng.randint(1, users),
+                    rng.randint(1, users) if i % 2 else rng.choice(staff),
+                    "message body " * 4,
+                    ts(730 * (messages - i) / messages),
+                )
+                for i in range(messages)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO audit_events (created_at, event, outcome, actor_id, target)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    ts(i % 90),
+                    rng.choice(["auth.login", "auth.refresh", "onboarding.upload"]),
+                    "success",
+                    rng.randint(1, users),
+                    f"user{i}",
+                )
+                for i in range(audit_events)
+            ),
+        )
+    conn.close()
+
+
+# --- Statement capture ---
+captured: list | None = None
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if captured is not None:
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        captured.append((statement, parameters))
+
+
+def cases():
+    """(name, crud function, call) for every crud coroutine."""
+    later = datetime.now(timezone.utc) + timedelta(days=30)
+    return [
+        ("bump_stats", crud.bump_stats, lambda db: crud.bump_stats(db, {"x": 1})),
+        ("get_stats", crud.get_stats, lambda db: crud.get_stats(db)),
+        ("_lock_stats", crud._lock_stats, crud._lock_stats),
+        ("reconcile_stats", crud.reconcile_stats, crud.reconcile_stats),
+        ("get_user_by_id", crud.get_user_by_id, lambda db: crud.get_user_by_id(db, 7)),
+        (
+            "get_user_by_email",
+            crud.get_user_by_email,
+            lambda db: crud.get_user_by_email(db, "user7@example.com"),
+        ),
+        (
+            "create_refresh_token",
+            crud.create_refresh_token,
+            lambda db: crud.create_refresh_token(db, 7, "token-new", later),
+        ),
+        (
+            "get_refresh_token",
+            crud.get_refresh_token,
+            lambda db: crud.get_refresh_token(db, "token-7"),
+        ),
+        (
+            "revoke_refresh_token",
+            crud.revoke_refresh_token,
+            lambda db: crud.revoke_refresh_token(db, "token-8"),
+        ),
+        (
+            "create_user",
+            crud.create_user,
+            lambda db: crud.create_user(db, "new@example.com", "Passw0rd!"),
+        ),
+        (
+            "create_client_for_user",
+            crud.create_client_for_user,
+            lambda db: crud.create_client_for_user(db, USERS, company_name="Acme"),
+        ),
+        (
+            "get_onboarding_user",
+            crud.get_onboarding_user,
+            lambda db: crud.get_onboarding_user(db, 7),
+        ),
+        (
+            "invalidate_onboarding_status",
+            crud.invalidate_onboarding_status,
+            lambda db: crud.invalidate_onboarding_status(7),
+        ),
+        ("list_clients", crud.list_clients, lambda db: crud.list_clients(db)),
+        (
+            "mark_kyc_uploaded",
+            crud.mark_kyc_uploaded,
+            lambda db: crud.mark_kyc_uploaded(db, 9),
+        ),
+        (
+            "set_client_status",
+            crud.set_client_status,
+            lambda db: crud.set_client_status(db, 9, "active"),
+        ),
+        (
+            "save_file_record",
+            crud.save_file_record,
+            lambda db: crud.save_file_record(db, "a.pdf", "uploads/a.pdf", "kyc", 9),
+        ),
+        (
+            "create_message",
+            crud.create_message,
+            lambda db: crud.create_message(
+                db, schemas.MessageCreate(receiver_id=9, content="hi"), 1
+            ),
+        ),
+        (
+            "get_conversation",
+            crud.get_conversation,
+            lambda db: crud.get_conversation(db, 1, 9),
+        ),
+        (
+            "authenticate_user",
+            crud.authenticate_user,
+            lambda db: crud.authenticate_user(db, "user7@example.com", "wrong"),
+        ),
+        (
+            "get_message_by_id",
+            crud.get_message_by_id,
+            lambda db: crud.get_message_by_id(db, MESSAGES),
+        ),
+        (
+            "get_message_by_id[archive]",
+            crud.get_message_by_id,
+            lambda db: crud.get_message_by_id(db, 1),
+        ),
+        (
+            "get_user_messages_page",
+            crud.get_user_messages_page,
+            lambda db: crud.get_user_messages_page(db, 1, limit=50),
+        ),
+        (
+            "get_user_messages_page[archive]",
+            crud.get_user_messages_page,
+            lambda db: crud.get_user_messages_page(
+                db, 1, before_id=MESSAGES // 4, limit=50
+            ),
+        ),
+        ("list_audit_events", crud.list_audit_events, crud.list_audit_events),
+        (
+            "list_audit_events[event]",
+            crud.list_audit_events,
+            lambda db: crud.list_audit_events(db, event="auth.login"),
+        ),
+        (
+            "list_audit_events[actor]",
+            crud.list_audit_events,
+            lambda db: crud.list_audit_events(db, actor_id=7, before_id=10_000),
+        ),
+        (
+            "get_broadcast_recipient_ids[all]",
+            crud.get_broadcast_recipient_ids,
+            crud.get_broadcast_recipient_ids,
+        ),
+        (
+            "get_broadcast_recipient_ids[status]",
+            crud.get_broadcast_recipient_ids,
+            lambda db: crud.get_broadcast_recipient_ids(db, client_status="active"),
+        ),
+        (
+            "get_broadcast_recipient_ids[ids]",
+            crud.get_broadcast_recipient_ids,
+            lambda db: crud.get_broadcast_recipient_ids(db, receiver_ids=[3, 4, 5]),
+        ),
+        (
+            "bulk_create_messages",
+            crud.bulk_create_messages,
+            lambda db: crud.bulk_create_messages(db, 1, [3, 4, 5], "hello"),
+        ),
+    ]
+
+
+def problems(name: str, statement: str, plan: list[str]) -> list[str]:
+    allowed = ALLOWED.get(name, {})
+    tables = known_tables()
+    # Plans name joined-eager-load aliases ("files_1"), not tables
+    aliases = dict((a, t) for t, a in _ALIAS_RE.findall(statement) if t in tables)
+    table_of = lambda detail: aliases.get(plan_table(detail), plan_table(detail))
+    touched = {
+        table_of(detail) for detail in plan if detail.startswith(("SCAN", "SEARCH"))
+    }
+    if touched <= set(SMALL_TABLES):
+        return []
+    found = []
+    for detail in plan:
+        if detail.startswith("SCAN"):
+            if table_of(detail) not in tables:  # subquery / CTE co-routines
+                continue
+        elif "USE TEMP B-TREE" not in detail and "AUTOMATIC" not in detail:
+            continue  # AUTOMATIC: SQLite builds a throwaway index per query
+        if not any(detail.startswith(prefix) for prefix in allowed):
+            found.append(detail)
+    return found
+
+
+_ALIAS_RE = re.compile(r'(?:FROM|JOIN)\s+"?(\w+)"?\s+AS\s+"?(\w+)"?')
+
+
+def plan_table(detail: str) -> str:
+    """ "SCAN users", "SEARCH TABLE users USING ..." -> "users"."""
+    words = detail.split()
+    return words[2] if words[1] == "TABLE" else words[1]
+
+
+_tables: set | None = None
+
+
+def known_tables() -> set:
+    global _tables
+    if _tables is None:
+        conn = sqlite3.connect(DB_PATH)
+        _tables = {
+            r[0]
+            for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        conn.close()
+    return _tables
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # One loop for the module: the engine's pooled connections belong to it
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def explain(loop):
+    migrate()
+    seed(USERS, MESSAGES, AUDIT_EVENTS)
+    # Move the oldest months into archive partitions, as the archive job does
+    loop.run_until_complete(archive.run_archival(older_than_days=540, batch_size=5000))
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+
+CASES = cases()
+
+
+@pytest.mark.parametrize("name, fn, call", CASES, ids=[c[0] for c in CASES])
+def test_query_plan(name, fn, call, loop, explain):
+    global captured
+    captured = []
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await call(db)
+
+    try:
+        loop.run_until_complete(run())
+        statements = captured
+    finally:
+        captured = None
+    report = []
+    for statement, params in statements:
+        plan = [
+            row[3] for row in explain.execute(f"EXPLAIN QUERY PLAN {statement}", params)
+        ]
+        issues = problems(name, statement, plan)
+        if issues:
+            report.append(
+                f"{' '.join(statement.split())[:160]}\n"
+                + "\n".join(f"  {'!!' if d in issues else '  '} {d}" for d in plan)
+            )
+    assert not report, "\n\n".join(report)
+
+
+def test_every_crud_coroutine_has_a_case():
+    covered = {fn.__name__ for _, fn, _ in CASES}
+    missing = sorted(
+        name
+        for name, fn in inspect.getmembers(crud, inspect.iscoroutinefunction)
+        if fn.__module__ == crud.__name__ and name not in covered
+    )
+    assert not missing, f"no query-plan case for: {', '.join(missing)}"
@@ -1,25 +1,30 @@
-# backend/scripts/create_admin.py
+# scripts/create_admin.py
 """
-Usage (from backend/):
+Usage (from backend/, after `alembic upgrade head`):
   source .venv/bin/activate
-  python scripts/create_admin.py --email admin@eranoconsulting.local --password 'ChangeMe123!'
+  python ../scripts/create_admin.py --email admin@eranoconsulting.local --password 'ChangeMe123!'
+
+Settings (DATABASE_URL, BCRYPT_ROUNDS, ...) come from the environment and
+backend/.env through app.config.get_settings().
 """
-import sys, os
+import os
+import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
 import asyncio
 import argparse
-from dotenv import load_dotenv
-
-load_dotenv()
 
-from app.db import AsyncSessionLocal, init_db
+from app.db import AsyncSessionLocal, verify_schema_version
 from app import crud
 
 
 async def main(email: str, password: str):
-    # ensure DB exists
-    await init_db()
+    # The schema belongs to Alembic; creating tables here would leave them
+    # unstamped, and the app would then refuse to boot
+    try:
+        await verify_schema_version()
+    except RuntimeError as e:
+        sys.exit(str(e))
     async with AsyncSessionLocal() as db:
         existing = await crud.get_user_by_email(db, email)
         if existing:
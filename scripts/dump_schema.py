@@ -0,0 +1,63 @@
+# scripts/dump_schema.py
+"""
+Regenerate scripts/init_db.sql from the Alembic migrations.
+
+Usage (from backend/):
+  python ../scripts/dump_schema.py ../scripts/init_db.sql
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+import argparse
+import sqlite3
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+DB_PATH = Path(tempfile.mkdtemp()) / "schema.db"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+from alembic import command
+from alembic.config import Config
+
+
+def migrate():
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(cfg, "head")
+
+
+def write_schema(path: Path):
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL "
+        "AND name NOT LIKE 'sqlite_%' AND tbl_name != 'alembic_version' "
+        "ORDER BY tbl_name, type DESC, name"
+    ).fetchall()
+    conn.close()
+    header = (
+        "-- scripts/init_db.sql\n"
+        "-- Generated from the Alembic migrations by\n"
+        "--   python ../scripts/dump_schema.py ../scripts/init_db.sql\n"
+        "-- Do not edit by hand. A database created from this file must be\n"
+        "-- stamped before the app will start: alembic stamp head\n"
+    )
+    body = "\n\n".join(
+        "\n".join(line.rstrip() for line in sql.splitlines()) + ";" for (sql,) in rows
+    )
+    path.write_text(f"{header}BEGIN;\n\n{body}\n\nCOMMIT;\n")
+    print(f"schema written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path, help="output .sql file")
+    args = parser.parse_args()
+    migrate()
+    write_schema(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# scripts/import_clients.py
+"""
+Bulk-import client accounts (users + clients rows) from CSV or JSONL.
+
+Usage (from backend/, after `alembic upgrade head`):
+  source .venv/bin/activate
+  python ../scripts/import_clients.py clients.csv
+  python ../scripts/import_clients.py clients.jsonl --chunk-size 2000 --workers 8
+
+Columns / keys:
+  email (required), password or hashed_password (one required),
+  company_name, contact_name, contact_phone, contact_email,
+  status (pending|active|rejected), kyc_uploaded, payment_verified, created_at
+
+Input is streamed. Each chunk's passwords are hashed on a process pool
+while the previous chunk is inserted. Every chunk is one transaction
+(executemany), and <input>.checkpoint records how many input rows are
+done, so a rerun resumes after the last committed chunk. Rows that fail
+validation or already exist go to <input>.rejects.jsonl. Dashboard stats
+are reconciled once at the end.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+import argparse
+import asyncio
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from pydantic import EmailStr
+from sqlalchemy import insert, select
+
+from app import crud, models, utils
+from app.db import AsyncSessionLocal
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+def read_rows(path: Path, fmt: str):
+    """Yield (line_no, row) without loading the whole file.
+
+    CSV rows are dicts; JSONL lines are yielded unparsed so that parse_row()
+    rejects a malformed line instead of aborting the import.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=1):
+                yield n, row
+        else:
+            for n, line in enumerate(f, start=1):
+                if line.strip():
+                    yield n, line
+
+
+TEXT_FIELDS = (
+    "email",
+    "password",
+    "hashed_password",
+    "company_name",
+    "contact_name",
+    "contact_phone",
+    "contact_email",
+    "status",
+    "created_at",
+)
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def parse_row(row) -> dict:
+    """CSV rows pass through; a JSONL line is parsed (ValueError if malformed)."""
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except ValueError:
+            raise ValueError("invalid JSON")
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object")
+    return row
+
+
+def validate(row: dict) -> dict:
+    """Normalize one input row; raises ValueError with the rejection reason."""
+    # JSONL values can be numbers, lists or objects; reject them here rather
+    # than let .strip() or fromisoformat() raise and abort the import
+    for key in TEXT_FIELDS:
+        value = row.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+    # Same normalization as the register endpoints (schemas use EmailStr),
+    # so imported users log in with the address they would have signed up with
+    try:
+        email = EmailStr.validate(str(row.get("email") or "").strip())
+    except ValueError:
+        raise ValueError("invalid email")
+    if not (row.get("password") or row.get("hashed_password")):
+        raise ValueError("password or hashed_password required")
+    status = (row.get("status") or "pending").strip().lower()
+    if status not in crud.CLIENT_STATUSES:
+        raise ValueError(f"invalid status {status!r}")
+    created_at = row.get("created_at") or None
+    if created_at:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            raise ValueError(f"invalid created_at {created_at!r}")
+    return {
+        "email": email,
+        "password": row.get("password") or None,
+        "hashed_password": row.get("hashed_password") or None,
+        "company_name": row.get("company_name") or None,
+        "contact_name": row.get("contact_name") or None,
+        "contact_phone": row.get("contact_phone") or None,
+        "contact_email": row.get("contact_email") or email,
+        "status": status,
+        "kyc_uploaded": _flag(row.get("kyc_uploaded")),
+        "payment_verified": _flag(row.get("payment_verified")),
+        "created_at": created_at,
+    }
+
+
+class Importer:
+    def __init__(self, path: Path, fmt: str, chunk_size: int, workers: int):
+        self.path = path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.checkpoint_path = path.with_name(path.name + ".checkpoint")
+        self.rejects_path = path.with_name(path.name + ".rejects.jsonl")
+        self.done = 0  # input rows fully processed (committed or rejected)
+        self.inserted = 0
+        self.rejected = 0
+
+    def load_checkpoint(self) -> int:
+        if self.checkpoint_path.exists():
+            return json.loads(self.checkpoint_path.read_text())["rows_done"]
+        return 0
+
+    def save_checkpoint(self):
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"rows_done": self.done}))
+        tmp.replace(self.checkpoint_path)
+
+    def reject(self, rejects, line_no: int, error: str, row):
+        if isinstance(row, dict):
+            row = {
+                k: v for k, v in row.items() if k not in ("password", "hashed_password")
+            }
+        else:
+            row = None  # unparsed JSONL line; may hold a plain password
+        rejects.write(
+            json.dumps({"line": line_no, "error": error, "row": row}, default=str)
+            + "\n"
+        )
+        self.rejected += 1
+
+    def chunks(self, skip: int, rejects):
+        """Validated chunks of (line_no, record); invalid rows are rejected here."""
+        rows = islice(read_rows(self.path, self.fmt), skip, None)
+        while batch := list(islice(rows, self.chunk_size)):
+            valid, seen = [], set()
+            for line_no, row in batch:
+                try:
+                    row = parse_row(row)
+                    record = validate(row)
+                except ValueError as e:
+                    self.reject(rejects, line_no, str(e), row)
+                    continue
+                if record["email"] in seen:
+                    self.reject(rejects, line_no, "duplicate email in input", record)
+                    continue
+                seen.add(record["email"])
+                valid.append((line_no, record))
+            yield len(batch), valid
+
+    async def hash_chunk(self, pool, valid):
+        """Hash plain passwords on the process pool; returns records in order."""
+        loop = asyncio.get_running_loop()
+        plain = [r["password"] for _, r in valid if not r["hashed_password"]]
+        hashes = iter(
+            await loop.run_in_executor(
+                None,
+                lambda: list(pool.map(utils.hash_password, plain, chunksize=32)),
+            )
+        )
+        for _, r in valid:
+            if not r["hashed_password"]:
+                r["hashed_password"] = next(hashes)
+            r.pop("password")
+        return valid
+
+    async def insert_chunk(self, db, valid, rejects) -> int:
+        emails = [r["email"] for _, r in valid]
+        existing = set(
+            (
+                await db.execute(
+                    select(models.User.email).where(models.User.email.in_(emails))
+                )
+            ).scalars()
+        )
+        fresh = []
+        for line_no, r in valid:
+            if r["email"] in existing:
+                self.reject(rejects, line_no, "email already registered", r)
+            else:
+                fresh.append(r)
+        if not fresh:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            insert(models.User),
+            [
+                {
+                    "email": r["email"],
+                    "hashed_password": r["hashed_password"],
+                    "role": "client",
+                    "is_active": True,
+                    "created_at": r["created_at"] or now,
+                }
+                for r in fresh
+            ],
+        )
+        ids = dict(
+            (
+                await db.execute(
+                    select(models.User.email, models.User.id).where(
+                        models.User.email.in_([r["email"] for r in fresh])
+                    )
+                )
+            ).all()
+        )
+        await db.execute(
+            insert(models.Client),
+            [
+                {
+                    "user_id": ids[r["email"]],
+                    "company_name": r["company_name"],
+                    "contact_name": r["contact_name"],
+                    "contact_phone": r["contact_phone"],
+                    "contact_email": r["contact_email"],
+                    "status": r["status"],
+                    "kyc_uploaded": r["kyc_uploaded"],
+                    "payment_verified": r["payment_verified"],
+                    "created_at": r["created_at"] or now,
+                }
+                for r in fresh
+            ],
+        )
+        await db.commit()
+        return len(fresh)
+
+    def report(self, started: float, final: bool = False):
+        elapsed = time.perf_counter() - started
+        rate = self.inserted / elapsed if elapsed else 0.0
+        print(
+            f"{'done' if final else 'progress'}: rows={self.done} "
+            f"inserted={self.inserted} rejected={self.rejected} "
+            f"elapsed={elapsed:.1f}s rate={rate:.0f} rows/s",
+            flush=True,
+        )
+
+    async def run(self):
+        skip = self.done = self.load_checkpoint()
+        if skip:
+            print(f"Resuming after {skip} rows (checkpoint {self.checkpoint_path})")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, open(
+            self.rejects_path, "a", encoding="utf-8"
+        ) as rejects:
+            chunks = self.chunks(skip, rejects)
+
+            def start_next():
+                # (input row count, hashing task) for the next chunk, or None
+                nxt = next(chunks, None)
+                if nxt is None:
+                    return None
+                return nxt[0], asyncio.create_task(self.hash_chunk(pool, nxt[1]))
+
+            async with AsyncSessionLocal() as db:
+                pending = start_next()
+                while pending:
+                    count, hashing = pending
+                    valid = await hashing
+                    # Hash the following chunk while this one is inserted
+                    pending = start_next()
+                    self.inserted += await self.insert_chunk(db, valid, rejects)
+                    self.done += count
+                    rejects.flush()
+                    self.save_checkpoint()
+                    self.report(started)
+                await crud.reconcile_stats(db)
+        self.report(started, final=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import client accounts")
+    parser.add_argument("input", type=Path, help="CSV or JSONL file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="hashing processes"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore an existing checkpoint"
+    )
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.input.suffix.lower() == ".csv" else "jsonl")
+    importer = Importer(args.input, fmt, args.chunk_size, args.workers)
+    if args.restart:
+        importer.checkpoint_path.unlink(missing_ok=True)
+    asyncio.run(importer.run())
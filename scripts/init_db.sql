@@ -1,47 +1,159 @@
 -- scripts/init_db.sql
+-- Generated from the Alembic migrations by
+--   python ../scripts/dump_schema.py ../scripts/init_db.sql
+-- Do not edit by hand. A database created from this file must be
+-- stamped before the app will start: alembic stamp head
 BEGIN;
-CREATE TABLE IF NOT EXISTS users (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  email VARCHAR(256) NOT NULL UNIQUE,
-  hashed_password VARCHAR(512) NOT NULL,
-  role VARCHAR(50) DEFAULT 'client',
-  is_active BOOLEAN DEFAULT 1,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS clients (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id INTEGER UNIQUE,
-  company_name VARCHAR(256),
-  contact_name VARCHAR(256),
-  contact_phone VARCHAR(100),
-  contact_email VARCHAR(256),
-  status VARCHAR(50) DEFAULT 'pending',
-  kyc_uploaded BOOLEAN DEFAULT 0,
-  payment_verified BOOLEAN DEFAULT 0,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY(user_id) REFERENCES users(id)
-);
-
-CREATE TABLE IF NOT EXISTS files (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  filename TEXT NOT NULL,
-  path TEXT NOT NULL,
-  file_type VARCHAR(100),
-  uploader_id INTEGER,
-  uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY(uploader_id) REFERENCES users(id)
+
+CREATE TABLE audit_events (
+	id INTEGER NOT NULL,
+	created_at DATETIME NOT NULL,
+	event VARCHAR(64) NOT NULL,
+	outcome VARCHAR(16) NOT NULL,
+	actor_id INTEGER,
+	target VARCHAR(256),
+	ip VARCHAR(64),
+	request_id VARCHAR(64),
+	details TEXT,
+	PRIMARY KEY (id)
 );
-COMMIT;
 
+CREATE INDEX ix_audit_events_actor_id ON audit_events (actor_id);
+
+CREATE INDEX ix_audit_events_created_at ON audit_events (created_at);
+
+CREATE INDEX ix_audit_events_event ON audit_events (event);
+
+CREATE TABLE clients (
+	id INTEGER NOT NULL,
+	user_id INTEGER,
+	company_name VARCHAR(256),
+	contact_name VARCHAR(256),
+	contact_phone VARCHAR(100),
+	contact_email VARCHAR(256),
+	status VARCHAR(50),
+	kyc_uploaded BOOLEAN,
+	payment_verified BOOLEAN,
+	created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id),
+	UNIQUE (user_id)
+);
+
+CREATE INDEX ix_clients_created_at ON clients (created_at);
+
+CREATE INDEX ix_clients_id ON clients (id);
+
+CREATE INDEX ix_clients_status ON clients (status, user_id);
+
+CREATE TABLE daily_stats (
+	day DATE NOT NULL,
+	metric VARCHAR(50) NOT NULL,
+	count INTEGER NOT NULL,
+	PRIMARY KEY (day, metric)
+);
+
+CREATE TABLE files (
+	id INTEGER NOT NULL,
+	filename VARCHAR(512) NOT NULL,
+	path TEXT NOT NULL,
+	file_type VARCHAR(100),
+	uploader_id INTEGER,
+	uploaded_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+	PRIMARY KEY (id),
+	FOREIGN KEY(uploader_id) REFERENCES users (id)
+);
+
+CREATE INDEX ix_files_id ON files (id);
+
+CREATE INDEX ix_files_uploader_id ON files (uploader_id);
+
+CREATE TABLE message_archive_partitions (
+	month VARCHAR(7) NOT NULL,
+	table_name VARCHAR(64) NOT NULL,
+	row_count INTEGER NOT NULL,
+	min_id INTEGER,
+	max_id INTEGER,
+	max_timestamp DATETIME,
+	updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+	PRIMARY KEY (month)
+);
+
+CREATE TABLE messages (
+	id INTEGER NOT NULL,
+	sender_id INTEGER NOT NULL,
+	receiver_id INTEGER NOT NULL,
+	content TEXT NOT NULL,
+	timestamp DATETIME,
+	PRIMARY KEY (id),
+	FOREIGN KEY(sender_id) REFERENCES users (id),
+	FOREIGN KEY(receiver_id) REFERENCES users (id)
+);
+
+CREATE INDEX ix_messages_conversation ON messages (sender_id, receiver_id, timestamp);
+
+CREATE INDEX ix_messages_id ON messages (id);
+
+CREATE INDEX ix_messages_receiver_id ON messages (receiver_id, id);
+
+CREATE INDEX ix_messages_sender_id ON messages (sender_id, id);
+
+CREATE INDEX ix_messages_timestamp ON messages (timestamp);
 
--- append to scripts/init_db.sql
-CREATE TABLE IF NOT EXISTS refresh_tokens (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  token TEXT NOT NULL UNIQUE,
-  user_id INTEGER NOT NULL,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  expires_at DATETIME NOT NULL,
-  revoked BOOLEAN DEFAULT 0,
-  FOREIGN KEY(user_id) REFERENCES users(id)
+CREATE TABLE notification_outbox (
+	id INTEGER NOT NULL,
+	created_at DATETIME,
+	recipient_id INTEGER NOT NULL,
+	kind VARCHAR(50) NOT NULL,
+	payload TEXT,
+	status VARCHAR(16) NOT NULL,
+	attempts INTEGER NOT NULL,
+	next_attempt_at DATETIME,
+	claimed_by VARCHAR(64),
+	claimed_at DATETIME,
+	sent_at DATETIME,
+	last_error TEXT,
+	PRIMARY KEY (id),
+	FOREIGN KEY(recipient_id) REFERENCES users (id)
 );
+
+CREATE INDEX ix_notification_outbox_recipient_id ON notification_outbox (recipient_id);
+
+CREATE INDEX ix_notification_outbox_status_due ON notification_outbox (status, next_attempt_at);
+
+CREATE TABLE refresh_tokens (
+	id INTEGER NOT NULL,
+	token VARCHAR(512) NOT NULL,
+	user_id INTEGER NOT NULL,
+	created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+	expires_at DATETIME NOT NULL,
+	revoked BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE INDEX ix_refresh_tokens_id ON refresh_tokens (id);
+
+CREATE UNIQUE INDEX ix_refresh_tokens_token ON refresh_tokens (token);
+
+CREATE TABLE stat_counters (
+	name VARCHAR(100) NOT NULL,
+	value INTEGER NOT NULL,
+	PRIMARY KEY (name)
+);
+
+CREATE TABLE users (
+	id INTEGER NOT NULL,
+	email VARCHAR(256) NOT NULL,
+	hashed_password VARCHAR(512) NOT NULL,
+	role VARCHAR(50),
+	is_active BOOLEAN,
+	created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+	PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+
+CREATE INDEX ix_users_id ON users (id);
+
+COMMIT;
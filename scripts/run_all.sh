@@ -3,8 +3,11 @@ set -euo pipefail
 ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
 cd "$ROOT_DIR/backend"
 echo "Activate Python venv and install requirements if not done."
+echo "Apply database migrations (schema is no longer created at app startup):"
+echo "  source .venv/bin/activate && alembic upgrade head"
 echo "To start backend (dev):"
 echo "  source .venv/bin/activate && uvicorn app.main:app --reload --host 127.0.0.1 --port 8000"
+echo "Production (N workers sized to CPU cores): ./scripts/run_prod.sh"
 echo
 echo "Frontend apps (open separate terminals):"
 echo "  cd frontend/main-site && npm install && npm run dev -- -p 3000"
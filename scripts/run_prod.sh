@@ -0,0 +1,12 @@
+#!/usr/bin/env bash
+# Production launch: N uvicorn workers under gunicorn (see backend/gunicorn.conf.py).
+#   WEB_CONCURRENCY=8 BIND=0.0.0.0:8000 ./scripts/run_prod.sh
+# Load new code after a deploy (HUP does not: the app is preloaded in the master):
+#   kill -USR2 "$(cat backend/gunicorn.pid)"            # new master + workers
+#   kill -QUIT "$(cat backend/gunicorn.pid.oldbin)"     # old master drains and exits
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+cd "$ROOT_DIR/backend"
+export SHARED_STATE_BACKEND="${SHARED_STATE_BACKEND:-sqlite}"
+alembic upgrade head
+exec gunicorn -c gunicorn.conf.py --pid gunicorn.pid app.main:app